@@ -0,0 +1 @@
+python bench/bench_pipeline.py "$@"
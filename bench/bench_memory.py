@@ -0,0 +1,114 @@
+import argparse
+import os
+import sys
+import tracemalloc
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(bench_dir, "..", "src"))
+
+from htmlnode import LeafNode, ParentNode  # noqa: E402
+from inline_markdown import text_to_textnodes  # noqa: E402
+from textnode import TextNode  # noqa: E402
+
+
+# same constructors and data, but with a per-instance __dict__ like the nodes
+# had before they were slotted
+class DictLeafNode:
+    def __init__(self, tag, value, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = None
+        self.props = props
+
+
+class DictParentNode:
+    def __init__(self, tag, children, props=None):
+        self.tag = tag
+        self.value = None
+        self.children = children
+        self.props = props
+
+
+class DictTextNode:
+    def __init__(self, text, text_type, url=None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+
+def synthetic_paragraph(i: int) -> str:
+    return (
+        f"Paragraph {i} has **bold**, *italic* and `code` with a "
+        f"[link](https://example.com/{i}) and an ![image](/images/{i}.png) in it."
+    )
+
+
+def build_text_nodes(paragraphs, node_class):
+    return [
+        [node_class(node.text, node.text_type, node.url) for node in nodes]
+        for nodes in map(text_to_textnodes, paragraphs)
+    ]
+
+
+def build_html_nodes(text_nodes, leaf_class, parent_class):
+    return parent_class(
+        "div",
+        [
+            parent_class("p", [leaf_class(None, node.text) for node in nodes])
+            for nodes in text_nodes
+        ],
+    )
+
+
+def measure(build):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def count_nodes(html_node) -> int:
+    if html_node.children is None:
+        return 1
+    return 1 + sum(map(count_nodes, html_node.children))
+
+
+def main(paragraph_count: int):
+    paragraphs = [synthetic_paragraph(i) for i in range(paragraph_count)]
+    # the strings are shared by both variants, so only node overhead is measured
+    text_nodes = build_text_nodes(paragraphs, TextNode)
+    text_node_count = sum(map(len, text_nodes))
+
+    rows = [
+        (
+            "TextNode",
+            text_node_count,
+            measure(lambda: build_text_nodes(paragraphs, DictTextNode))[1],
+            measure(lambda: build_text_nodes(paragraphs, TextNode))[1],
+        )
+    ]
+    html_node, slotted_bytes = measure(
+        lambda: build_html_nodes(text_nodes, LeafNode, ParentNode)
+    )
+    _, dict_bytes = measure(
+        lambda: build_html_nodes(text_nodes, DictLeafNode, DictParentNode)
+    )
+    rows.append(("HtmlNode", count_nodes(html_node), dict_bytes, slotted_bytes))
+
+    print(f"{paragraph_count} paragraphs")
+    print(f"{'node':<10}{'count':>10}{'dict B/node':>14}{'slots B/node':>14}")
+    for name, count, dict_bytes, slotted_bytes in rows:
+        print(
+            f"{name:<10}{count:>10}{dict_bytes / count:>14.1f}"
+            f"{slotted_bytes / count:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Node memory benchmark")
+    parser.add_argument("--paragraphs", type=int, default=20000)
+    args = parser.parse_args()
+
+    main(args.paragraphs)
@@ -0,0 +1,167 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from typing import Callable, Dict
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(bench_dir, "..", "src"))
+
+from block_markdown import (  # noqa: E402
+    BlockType,
+    get_block_type,
+    markdown_to_blocks,
+    markdown_to_html,
+    markdown_to_htmlnode,
+)
+from corpus import SHAPES, write_corpus_tree  # noqa: E402
+from html_generation import generate_page_recursive  # noqa: E402
+from inline_markdown import text_to_textnodes  # noqa: E402
+
+SIZES = {"small": 10, "medium": 100, "large": 400}
+INLINE_BLOCK_TYPES = (
+    BlockType.PARAGRAPH,
+    BlockType.QUOTE,
+    BlockType.UNORDERED_LIST,
+    BlockType.ORDERED_LIST,
+)
+
+
+def best_of(repeat: int, run: Callable[[], object]) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def bench_stages(markdown: str, repeat: int) -> Dict[str, float]:
+    blocks = markdown_to_blocks(markdown)
+    inline_texts = [
+        block.replace("\n", " ")
+        for block in blocks
+        if get_block_type(block) in INLINE_BLOCK_TYPES
+    ]
+    html_node = markdown_to_htmlnode(markdown)
+    return {
+        "markdown_to_blocks": best_of(repeat, lambda: markdown_to_blocks(markdown)),
+        "get_block_type": best_of(
+            repeat, lambda: [get_block_type(block) for block in blocks]
+        ),
+        "text_to_textnodes": best_of(
+            repeat, lambda: [text_to_textnodes(text) for text in inline_texts]
+        ),
+        "markdown_to_htmlnode": best_of(
+            repeat, lambda: markdown_to_htmlnode(markdown)
+        ),
+        "to_html": best_of(repeat, html_node.to_html),
+        "markdown_to_html": best_of(repeat, lambda: markdown_to_html(markdown)),
+    }
+
+
+def bench_build(files: int, repeat: int, processes: int) -> float:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        content_dir = os.path.join(tmp_dir, "content")
+        template_path = os.path.join(tmp_dir, "template.html")
+        write_corpus_tree(content_dir, files)
+        with open(template_path, "w") as file:
+            file.write("<title>{{ Title }}</title><article>{{ Content }}</article>")
+
+        runs = itertools.count()
+
+        def build():
+            # a fresh tree every time: writes of unchanged outputs are skipped,
+            # so rebuilding into the same tree would only time the comparisons
+            dest_dir = os.path.join(tmp_dir, f"public-{next(runs)}")
+            generate_page_recursive(content_dir, template_path, dest_dir, processes)
+
+        # page logs would dominate the timing of small pages
+        with open(os.devnull, "w") as devnull:
+            stdout = sys.stdout
+            sys.stdout = devnull
+            try:
+                return best_of(repeat, build)
+            finally:
+                sys.stdout = stdout
+
+
+def run(sizes: Dict[str, int], files: int, repeat: int, processes: int):
+    results = {}
+    for shape_name, shape in SHAPES.items():
+        for size_name, size in sizes.items():
+            markdown = shape(size, 0)
+            for stage, seconds in bench_stages(markdown, repeat).items():
+                results[f"{shape_name}/{size_name}/{stage}"] = seconds
+    results[f"build/{files}_files"] = bench_build(files, max(1, repeat // 2), processes)
+    return results
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], threshold: float):
+    regressions = []
+    for name, seconds in results.items():
+        if name not in baseline:
+            continue
+        ratio = seconds / baseline[name] if baseline[name] else 1.0
+        marker = ""
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            marker = "  REGRESSION"
+        print(
+            f"{name:<55}{baseline[name]:>10.4f}s{seconds:>10.4f}s"
+            f"{ratio:>7.2f}x{marker}"
+        )
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Markdown pipeline benchmarks")
+    parser.add_argument(
+        "--output", type=str, default="bench_results.json", help="JSON results file"
+    )
+    parser.add_argument(
+        "--baseline", type=str, default=None, help="JSON results to compare against"
+    )
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=0.2,
+        help="Allowed slowdown against the baseline, 0.2 fails above 1.2x",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--jobs", type=int, default=1)
+    parser.add_argument(
+        "--quick", action="store_true", help="Only run the small corpus sizes"
+    )
+    args = parser.parse_args()
+
+    sizes = {"small": SIZES["small"]} if args.quick else SIZES
+    results = run(sizes, args.files, args.repeat, args.jobs)
+    with open(args.output, "w") as file:
+        json.dump(
+            {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "results": results,
+            },
+            file,
+            indent=2,
+            sort_keys=True,
+        )
+    print(f"Wrote {len(results)} timings to {args.output}")
+
+    if args.baseline is not None:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["results"]
+        regressions = compare(results, baseline, args.max_regression)
+        if regressions:
+            print(
+                f"{len(regressions)} benchmarks regressed by more than "
+                f"{args.max_regression:.0%}"
+            )
+            sys.exit(1)
@@ -0,0 +1,93 @@
+import os
+import random
+from typing import Callable, Dict
+
+
+def inline_text(rng: random.Random, words: int) -> str:
+    parts = []
+    for i in range(words):
+        roll = rng.random()
+        if roll < 0.05:
+            parts.append(f"**bold {i}**")
+        elif roll < 0.1:
+            parts.append(f"*italic {i}*")
+        elif roll < 0.13:
+            parts.append(f"`code {i}`")
+        elif roll < 0.16:
+            parts.append(f"[link {i}](https://example.com/{i})")
+        else:
+            parts.append(rng.choice(["middle", "earth", "ring", "hobbit", "elf"]))
+    return " ".join(parts)
+
+
+def long_paragraphs(size: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    blocks = ["# Long paragraphs"]
+    for _ in range(size):
+        lines = [inline_text(rng, 40) for _ in range(5)]
+        blocks.append("\n".join(lines))
+    return "\n\n".join(blocks)
+
+
+def deep_lists(size: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    blocks = ["# Lists"]
+    for i in range(size):
+        items = [inline_text(rng, 8) for _ in range(50)]
+        if i % 2:
+            blocks.append("\n".join(f"- {item}" for item in items))
+        else:
+            numbered = (f"{n % 10}. {item}" for n, item in enumerate(items))
+            blocks.append("\n".join(numbered))
+        blocks.append("\n".join(f"> {inline_text(rng, 8)}" for _ in range(10)))
+    return "\n\n".join(blocks)
+
+
+def many_links(size: int, seed: int = 0) -> str:
+    blocks = ["# Links"]
+    for i in range(size):
+        links = (f"[link {i}-{n}](https://example.com/{i}/{n})" for n in range(200))
+        blocks.append(" and ".join(links))
+        blocks.append(f"![image {i}](/images/{i}.png)")
+    return "\n\n".join(blocks)
+
+
+def large_code_fences(size: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    blocks = ["# Code"]
+    for i in range(size):
+        code = "\n".join(
+            f"    value_{n} = compute({rng.randint(0, 1000)})  # line {n}"
+            for n in range(500)
+        )
+        blocks.append(f"```\n{code}\n```")
+        blocks.append(f"## Section {i}")
+    return "\n\n".join(blocks)
+
+
+def mixed_page(size: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    blocks = [f"# Page {seed}"]
+    for i in range(size):
+        blocks.append(f"## Section {i}")
+        blocks.append(inline_text(rng, 60))
+        blocks.append("\n".join(f"- {inline_text(rng, 6)}" for _ in range(5)))
+        blocks.append(f"```\nprint({i})\n```")
+    return "\n\n".join(blocks)
+
+
+SHAPES: Dict[str, Callable[[int, int], str]] = {
+    "long_paragraphs": long_paragraphs,
+    "deep_lists": deep_lists,
+    "many_links": many_links,
+    "large_code_fences": large_code_fences,
+}
+
+
+def write_corpus_tree(root: str, files: int, page_size: int = 5):
+    # spread pages over nested directories like a real content tree
+    for i in range(files):
+        path = os.path.join(root, f"section-{i % 20}", f"page-{i}", "index.md")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(mixed_page(page_size, seed=i))
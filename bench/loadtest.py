@@ -0,0 +1,333 @@
+import argparse
+import glob
+import http.client
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlsplit
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.join(bench_dir, "..")
+SERVER_PATH = os.path.join(repo_dir, "server.py")
+HTTP_METHODS = ("GET", "HEAD", "POST", "PUT", "DELETE", "OPTIONS", "PATCH")
+
+
+class Request(NamedTuple):
+    method: str
+    # path and query only, the host is always the server under test
+    target: str
+    headers: Dict[str, str]
+    body: Optional[bytes]
+
+
+def request_target(url: str) -> str:
+    parts = urlsplit(url)
+    target = parts.path or "/"
+    return f"{target}?{parts.query}" if parts.query else target
+
+
+def parse_http_file(path: str) -> List[Request]:
+    # the editor .http format: "METHOD url [version]", header lines, a blank
+    # line and an optional body, with requests separated by ### lines
+    requests = []
+    with open(path) as file:
+        chunks = file.read().split("\n###")
+    for chunk in chunks:
+        lines = [
+            line.rstrip("\r")
+            for line in chunk.split("\n")
+            if not line.lstrip().startswith(("#", "//"))
+        ]
+        while lines and not lines[0].strip():
+            lines.pop(0)
+        if not lines:
+            continue
+        method, _, rest = lines[0].strip().partition(" ")
+        if method.upper() not in HTTP_METHODS:
+            continue
+        url = rest.split()[0] if rest.split() else "/"
+        headers = {}
+        index = 1
+        while index < len(lines) and lines[index].strip():
+            name, _, value = lines[index].partition(":")
+            headers[name.strip()] = value.strip()
+            index += 1
+        body = "\n".join(lines[index + 1 :]).strip()
+        requests.append(
+            Request(method.upper(), request_target(url), headers, body.encode() or None)
+        )
+    return requests
+
+
+def parse_jsonl_file(path: str) -> List[Request]:
+    # one {"method", "url", "headers", "body"} object per line; lines without
+    # a url, like work items that share the file name, are skipped
+    requests = []
+    with open(path) as file:
+        for line in file:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(entry, dict) or not isinstance(entry.get("url"), str):
+                continue
+            body = entry.get("body")
+            requests.append(
+                Request(
+                    entry.get("method", "GET").upper(),
+                    request_target(entry["url"]),
+                    dict(entry.get("headers") or {}),
+                    body.encode() if isinstance(body, str) else None,
+                )
+            )
+    return requests
+
+
+def load_requests(paths: List[str]) -> List[Request]:
+    requests = []
+    for path in paths:
+        if path.endswith(".jsonl"):
+            requests += parse_jsonl_file(path)
+        else:
+            requests += parse_http_file(path)
+    return requests
+
+
+def start_server(directory: str, port: int, server_args: List[str]):
+    server = subprocess.Popen(
+        [sys.executable, SERVER_PATH, "--dir", directory, "--port", str(port)]
+        + server_args,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"server.py exited with status {server.returncode}")
+        try:
+            socket.create_connection(("localhost", port), timeout=0.2).close()
+            return server
+        except OSError:
+            time.sleep(0.05)
+    server.terminate()
+    raise RuntimeError(f"server.py did not accept connections on port {port}")
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("localhost", 0))
+        return probe.getsockname()[1]
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    # nearest rank
+    if not sorted_values:
+        return 0.0
+    index = round(fraction * len(sorted_values)) - 1
+    return sorted_values[max(0, min(len(sorted_values) - 1, index))]
+
+
+class LoadTest:
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        requests: List[Request],
+        total: int,
+        concurrency: int,
+        rate: float,
+        timeout: float = 10.0,
+    ):
+        self.host = host
+        self.port = port
+        self.requests = requests
+        self.total = total
+        self.concurrency = concurrency
+        self.rate = rate
+        self.timeout = timeout
+        self.next_index = 0
+        self.lock = threading.Lock()
+        # (latency in seconds, status or None for a failed request)
+        self.results: List[Tuple[float, Optional[int]]] = []
+
+    def take(self) -> Optional[int]:
+        with self.lock:
+            if self.next_index >= self.total:
+                return None
+            self.next_index += 1
+            return self.next_index - 1
+
+    def worker(self, start: float):
+        connection = None
+        results = []
+        while True:
+            index = self.take()
+            if index is None:
+                break
+            request = self.requests[index % len(self.requests)]
+            # with a rate the schedule is fixed up front and latency counts from
+            # the planned send time, so a stalled server cannot hide its queue
+            # by slowing down the clients
+            sent = time.perf_counter()
+            if self.rate > 0:
+                sent = start + index / self.rate
+                delay = sent - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            status = None
+            try:
+                if connection is None:
+                    connection = http.client.HTTPConnection(
+                        self.host, self.port, timeout=self.timeout
+                    )
+                connection.request(
+                    request.method, request.target, request.body, request.headers
+                )
+                response = connection.getresponse()
+                response.read()
+                status = response.status
+                if response.will_close:
+                    connection.close()
+                    connection = None
+            except (OSError, http.client.HTTPException):
+                if connection is not None:
+                    connection.close()
+                connection = None
+            results.append((time.perf_counter() - sent, status))
+        if connection is not None:
+            connection.close()
+        with self.lock:
+            self.results += results
+
+    def run(self) -> Dict:
+        start = time.perf_counter()
+        workers = [
+            threading.Thread(target=self.worker, args=(start,))
+            for _ in range(self.concurrency)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+        return self.report(elapsed)
+
+    def report(self, elapsed: float) -> Dict:
+        latencies = sorted(latency for latency, _ in self.results)
+        statuses = Counter(
+            "failed" if status is None else str(status) for _, status in self.results
+        )
+        # connection failures, timeouts and 4xx or 5xx answers
+        errors = sum(
+            1 for _, status in self.results if status is None or status >= 400
+        )
+        count = len(self.results)
+        return {
+            "requests": count,
+            "seconds": elapsed,
+            "throughput": count / elapsed if elapsed else 0.0,
+            "errors": errors,
+            "error_rate": errors / count if count else 0.0,
+            "statuses": dict(sorted(statuses.items())),
+            "latency_ms": {
+                "mean": 1000 * sum(latencies) / count if count else 0.0,
+                "p50": 1000 * percentile(latencies, 0.50),
+                "p95": 1000 * percentile(latencies, 0.95),
+                "p99": 1000 * percentile(latencies, 0.99),
+                "max": 1000 * latencies[-1] if latencies else 0.0,
+            },
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Replay request files against server.py and report latencies"
+    )
+    parser.add_argument(
+        "files",
+        nargs="*",
+        help="Request files, .http or .jsonl; defaults to requests/*.http and "
+        "requests.jsonl",
+    )
+    parser.add_argument(
+        "--dir", type=str, default="public", help="Directory server.py serves"
+    )
+    parser.add_argument(
+        "--server-arg",
+        action="append",
+        default=[],
+        help="Extra server.py argument, like --server-arg=--production",
+    )
+    parser.add_argument(
+        "--target",
+        type=str,
+        default=None,
+        help="host:port of a running server to use instead of starting one",
+    )
+    parser.add_argument("--requests", type=int, default=2000, help="Total requests")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=0,
+        help="Requests per second across all clients, 0 sends as fast as possible",
+    )
+    parser.add_argument(
+        "--warmup", type=int, default=50, help="Requests sent before measuring"
+    )
+    parser.add_argument(
+        "--output", type=str, default=None, help="Also write the JSON report here"
+    )
+    args = parser.parse_args()
+
+    files = args.files or sorted(
+        glob.glob(os.path.join(repo_dir, "requests", "*.http"))
+    ) + [
+        path
+        for path in [os.path.join(repo_dir, "requests.jsonl")]
+        if os.path.exists(path)
+    ]
+    requests = load_requests(files)
+    if not requests:
+        sys.exit(f"No requests found in {', '.join(files) or 'requests/'}")
+
+    server = None
+    if args.target is None:
+        host, port = "localhost", free_port()
+        server = start_server(args.dir, port, args.server_arg)
+    else:
+        host, _, port = args.target.rpartition(":")
+        port = int(port)
+    try:
+        if args.warmup > 0:
+            LoadTest(host, port, requests, args.warmup, args.concurrency, 0).run()
+        report = LoadTest(
+            host, port, requests, args.requests, args.concurrency, args.rate
+        ).run()
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "server_args": args.server_arg,
+        "request_files": [os.path.relpath(path) for path in files],
+        "distinct_requests": len(requests),
+        "concurrency": args.concurrency,
+        "rate": args.rate,
+        **report,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output is not None:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
@@ -1,9 +1,140 @@
 import os
 import argparse
-from http.server import HTTPServer, SimpleHTTPRequestHandler
+from collections import OrderedDict
+from datetime import timezone
+from email.utils import formatdate, parsedate_to_datetime
+from functools import partial
+from http import HTTPStatus
+from http.server import HTTPServer, SimpleHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+import secrets
+import sys
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+from urllib.parse import unquote, urlsplit
+
+server_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(server_dir, "src"))
+
+# the build's own rules for which files get a .gz sibling and when it is
+# current, so the server never disagrees with the --precompress stage
+from compress_output import is_compressible, is_fresh_variant  # noqa: E402
+
+# the manifests written by the build's --etags and --fingerprint stages
+from etag_manifest import ETAG_MANIFEST_NAME, load_etag_manifest  # noqa: E402
+from fingerprint import ASSET_MANIFEST_NAME, load_asset_manifest  # noqa: E402
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# more ranges than this in one request are answered with the whole file
+MAX_RANGES = 32
+
+
+def parse_range_header(header: str, length: int) -> Optional[List[Tuple[int, int]]]:
+    # "bytes=0-99, 200-, -50" as sorted, merged (start, end) pairs with end
+    # inclusive. None means the header is to be ignored and the whole file
+    # sent, an empty list that no range overlaps the file
+    unit, _, specs = header.partition("=")
+    if unit.strip().lower() != "bytes":
+        return None
+    ranges = []
+    for spec in specs.split(","):
+        first, dash, last = spec.strip().partition("-")
+        if not dash or not (first + last).isdigit():
+            return None
+        if not first:
+            # suffix range, the last n bytes
+            if int(last) > 0 and length > 0:
+                ranges.append((max(length - int(last), 0), length - 1))
+            continue
+        start = int(first)
+        end = length - 1 if not last else min(int(last), length - 1)
+        if last and int(last) < start:
+            return None
+        if start < length:
+            ranges.append((start, end))
+    if len(ranges) > MAX_RANGES:
+        return None
+
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def load_immutable_paths(directory: str) -> Set[str]:
+    # the fingerprinted files, relative to directory; a name that only looks
+    # hashed, like photo.20240101.jpg, is not one of them
+    asset_map = load_asset_manifest(directory)
+    return {url.lstrip("/") for url in asset_map.values() if isinstance(url, str)}
+
+
+def manifest_etag(
+    etags: Dict[str, Dict], rel_path: str, stat: os.stat_result
+) -> Optional[str]:
+    entry = etags.get(rel_path)
+    # files rebuilt since the manifest was written have no known etag
+    if entry is None or (entry["mtime"], entry["size"]) != (
+        stat.st_mtime_ns,
+        stat.st_size,
+    ):
+        return None
+    return entry["etag"]
+
+
+def validator_headers(
+    rel_path: str,
+    stat: os.stat_result,
+    etag: Optional[str],
+    immutable_paths: Set[str],
+    vary_encoding: bool,
+) -> List[Tuple[str, str]]:
+    # the headers a 304 repeats, for the file at rel_path as of stat
+    headers = [("Last-Modified", formatdate(stat.st_mtime, usegmt=True))]
+    if etag is not None:
+        headers.append(("ETag", etag))
+    if rel_path in immutable_paths:
+        headers.append(("Cache-Control", IMMUTABLE_CACHE_CONTROL))
+    elif etag is not None:
+        headers.append(("Cache-Control", "no-cache"))
+    if vary_encoding:
+        headers.append(("Vary", "Accept-Encoding"))
+    return headers
+
+
+def accepts_encoding(header: Optional[str], encoding: str) -> bool:
+    # an entry naming the encoding wins over "*", and q=0 refuses it
+    qualities = {}
+    for item in (header or "").split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name.strip().lower()] = quality
+    quality = qualities.get(encoding, qualities.get("*", 0.0))
+    return quality > 0
 
 
 class CORSHTTPRequestHandler(SimpleHTTPRequestHandler):
+    def __init__(
+        self,
+        *args,
+        etags: Optional[Dict[str, Dict]] = None,
+        immutable_paths: Optional[Set[str]] = None,
+        **kwargs,
+    ):
+        self.etags = etags or {}
+        self.immutable_paths = immutable_paths or set()
+        super().__init__(*args, **kwargs)
+
     def end_headers(self):
         self.send_header("Access-Control-Allow-Origin", "*")
         self.send_header("Access-Control-Allow-Methods", "GET, OPTIONS")
@@ -12,18 +143,518 @@ class CORSHTTPRequestHandler(SimpleHTTPRequestHandler):
 
     def do_OPTIONS(self):
         self.send_response(200, "OK")
+        # without it a keep-alive client cannot tell where the response ends
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def resolve_file(self) -> Optional[str]:
+        # the regular file a request maps to, or None for anything the default
+        # handler takes care of: redirects, directory listings and 404s
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            if not urlsplit(self.path).path.endswith("/"):
+                return None
+            path = os.path.join(path, "index.html")
+        return path if os.path.isfile(path) else None
+
+    def negotiate(self, path: str, stat: os.stat_result):
+        # picks the precompressed variant when the client accepts it and it
+        # was written from the current version of the file
+        if not is_compressible(path):
+            return path, stat, None
+        gz_path = f"{path}.gz"
+        try:
+            gz_stat = os.stat(gz_path)
+        except OSError:
+            return path, stat, None
+        if not is_fresh_variant(stat, gz_stat):
+            return path, stat, None
+        self.vary_encoding = True
+        if not accepts_encoding(self.headers.get("Accept-Encoding"), "gzip"):
+            return path, stat, None
+        return gz_path, gz_stat, "gzip"
+
+    def relative_path(self, path: str) -> str:
+        return os.path.relpath(path, self.directory).replace(os.sep, "/")
+
+    def lookup_etag(self, path: str, stat: os.stat_result) -> Optional[str]:
+        return manifest_etag(self.etags, self.relative_path(path), stat)
+
+    def is_not_modified(self, etag: Optional[str], stat: os.stat_result) -> bool:
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            # If-Modified-Since is ignored when If-None-Match is sent
+            if etag is None:
+                return False
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since is None:
+            return False
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError, IndexError, OverflowError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return int(stat.st_mtime) <= since.timestamp()
+
+    def send_validators(self, path: str, stat: os.stat_result, etag: Optional[str]):
+        for name, value in validator_headers(
+            self.relative_path(path),
+            stat,
+            etag,
+            self.immutable_paths,
+            self.vary_encoding,
+        ):
+            self.send_header(name, value)
+
+    def open_body(self, path: str, stat: os.stat_result):
+        # returns the body and its length, measured on the opened file so a
+        # concurrent rebuild cannot make Content-Length lie
+        body = open(path, "rb")
+        return body, os.fstat(body.fileno()).st_size
+
+    def send_body(self, body, offset: int, count: int):
+        # the kernel copies straight from the page cache to the socket, and
+        # socket.sendfile falls back to plain sends where it cannot
+        self.connection.sendfile(body, offset, count)
+
+    def copyfile(self, source, outputfile):
+        # body_parts is set by send_head for the files it serves, everything
+        # else, like directory listings, goes the default way
+        if self.body_parts is None:
+            return super().copyfile(source, outputfile)
+        for prefix, offset, count in self.body_parts:
+            outputfile.write(prefix)
+            # sendfile rejects a count of 0, which an empty file asks for
+            if count:
+                self.send_body(source, offset, count)
+        outputfile.write(self.body_trailer)
+
+    def if_range_matches(self, etag: Optional[str], stat: os.stat_result) -> bool:
+        # a range only applies to the version of the file the client has part of
+        if_range = self.headers.get("If-Range")
+        if if_range is None:
+            return True
+        if_range = if_range.strip()
+        if if_range.startswith(('"', "W/")):
+            return etag is not None and if_range == etag
+        return if_range == self.date_time_string(stat.st_mtime)
+
+    def select_ranges(
+        self, length: int, etag: Optional[str], stat: os.stat_result
+    ) -> Optional[List[Tuple[int, int]]]:
+        header = self.headers.get("Range")
+        if header is None or not self.if_range_matches(etag, stat):
+            return None
+        return parse_range_header(header, length)
+
+    def send_ranges(
+        self, ranges: List[Tuple[int, int]], length: int, content_type: str
+    ):
+        if len(ranges) == 1:
+            start, end = ranges[0]
+            self.body_parts = [(b"", start, end - start + 1)]
+            self.send_response(HTTPStatus.PARTIAL_CONTENT)
+            self.send_header("Content-type", content_type)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{length}")
+            self.send_header("Content-Length", str(end - start + 1))
+            return
+
+        boundary = secrets.token_hex(16)
+        self.body_parts = [
+            (
+                (
+                    f"\r\n--{boundary}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Range: bytes {start}-{end}/{length}\r\n\r\n"
+                ).encode("latin-1"),
+                start,
+                end - start + 1,
+            )
+            for start, end in ranges
+        ]
+        self.body_trailer = f"\r\n--{boundary}--\r\n".encode("latin-1")
+        body_length = len(self.body_trailer) + sum(
+            len(prefix) + count for prefix, _, count in self.body_parts
+        )
+        self.send_response(HTTPStatus.PARTIAL_CONTENT)
+        self.send_header("Content-type", f"multipart/byteranges; boundary={boundary}")
+        self.send_header("Content-Length", str(body_length))
+
+    def send_head(self):
+        self.body_parts = None
+        self.body_trailer = b""
+        path = self.resolve_file()
+        if path is None:
+            return super().send_head()
+
+        self.vary_encoding = False
+        stat = os.stat(path)
+        body_path, body_stat, encoding = self.negotiate(path, stat)
+        etag = self.lookup_etag(body_path, body_stat)
+        if self.is_not_modified(etag, stat):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_validators(path, stat, etag)
+            self.end_headers()
+            return None
+
+        body, length = self.open_body(body_path, body_stat)
+        content_type = self.guess_type(path)
+        # ranges count bytes of the body as sent, the compressed one included
+        ranges = self.select_ranges(length, etag, body_stat)
+        if ranges == []:
+            body.close()
+            self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+            self.send_header("Content-Range", f"bytes */{length}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return None
+        if ranges is None:
+            self.body_parts = [(b"", 0, length)]
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-type", content_type)
+            self.send_header("Content-Length", str(length))
+        else:
+            self.send_ranges(ranges, length, content_type)
+        self.send_header("Accept-Ranges", "bytes")
+        if encoding is not None:
+            self.send_header("Content-Encoding", encoding)
+        self.send_validators(path, stat, etag)
+        self.end_headers()
+        return body
+
+
+class FileCache:
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        # path -> (mtime_ns, size, body), least recently used first
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, path: str, stat: os.stat_result):
+        # a stat is cheap compared to a read and catches every rebuild, so
+        # entries are validated on each request instead of being watched
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is not None and entry[:2] == (stat.st_mtime_ns, stat.st_size):
+                self.entries.move_to_end(path)
+                return entry[2]
+
+        with open(path, "rb") as file:
+            body = file.read()
+        if len(body) <= self.max_bytes:
+            self.put(path, (stat.st_mtime_ns, stat.st_size, body))
+        return body
+
+    def put(self, path: str, entry):
+        with self.lock:
+            previous = self.entries.pop(path, None)
+            if previous is not None:
+                self.size -= len(previous[2])
+            self.entries[path] = entry
+            self.size += len(entry[2])
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted[2])
+
+
+class CachingHTTPRequestHandler(CORSHTTPRequestHandler):
+    def __init__(self, *args, file_cache: FileCache, **kwargs):
+        self.file_cache = file_cache
+        super().__init__(*args, **kwargs)
+
+    def open_body(self, path: str, stat: os.stat_result):
+        # files too big to ever be cached are streamed with sendfile instead
+        # of being read whole into memory on every request
+        if stat.st_size > self.file_cache.max_bytes:
+            return super().open_body(path, stat)
+        body = self.file_cache.get(path, stat)
+        return BytesIO(body), len(body)
+
+    def send_body(self, body, offset: int, count: int):
+        if not isinstance(body, BytesIO):
+            return super().send_body(body, offset, count)
+        # cached bodies are already in memory, slicing the buffer copies nothing
+        with body.getbuffer() as buffer:
+            self.wfile.write(buffer[offset : offset + count])
+
+
+class RouteBody(NamedTuple):
+    path: str
+    # the file as it was when the headers were computed
+    stat: os.stat_result
+    etag: Optional[str]
+    # every header of a whole body 200, and the ones a 304 repeats
+    headers: Tuple[Tuple[str, str], ...]
+    validators: Tuple[Tuple[str, str], ...]
+
+    def is_current(self) -> bool:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False
+        return (stat.st_mtime_ns, stat.st_size) == (
+            self.stat.st_mtime_ns,
+            self.stat.st_size,
+        )
+
+
+class Route(NamedTuple):
+    path: str
+    content_type: str
+    body: RouteBody
+    # the fresh precompressed variant, if the build wrote one
+    gzip: Optional[RouteBody]
+
+
+def _mtime_ns(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class RouteTable:
+    # maps URL paths straight to files, so serving a known page needs no
+    # probing for directories and index files, and clean URLs like /majesty
+    # are answered without the redirect to /majesty/. The pages the build
+    # writes only use root-relative links, so both URLs render the same. Each
+    # route carries the response headers computed from the file, its .gz
+    # variant and the ETag and asset manifests, which are reloaded with it
+    def __init__(self, directory: str, guess_type, refresh_interval: float = 1.0):
+        self.directory = directory
+        self.guess_type = guess_type
+        self.refresh_interval = refresh_interval
+        self.routes: Dict[str, Route] = {}
+        self.etags: Dict[str, Dict] = {}
+        self.immutable_paths: Set[str] = set()
+        self.signature: Dict[str, Optional[int]] = {}
+        # set by a request that found a routed file changed in place, which
+        # leaves the mtime of its directory alone
+        self.stale = False
+        self.lock = threading.Lock()
+        self.refresh()
+
+    def lookup(self, url_path: str) -> Optional[Route]:
+        return self.routes.get(url_path)
+
+    def route_body(
+        self,
+        path: str,
+        stat: os.stat_result,
+        source_path: str,
+        source_stat: os.stat_result,
+        content_type: str,
+        encoding: Optional[str],
+        vary_encoding: bool,
+    ) -> RouteBody:
+        # the same headers the handler sends for a whole body response
+        rel_path = os.path.relpath(path, self.directory).replace(os.sep, "/")
+        etag = manifest_etag(self.etags, rel_path, stat)
+        validators = tuple(
+            validator_headers(
+                os.path.relpath(source_path, self.directory).replace(os.sep, "/"),
+                source_stat,
+                etag,
+                self.immutable_paths,
+                vary_encoding,
+            )
+        )
+        headers = [
+            ("Content-type", content_type),
+            ("Content-Length", str(stat.st_size)),
+            ("Accept-Ranges", "bytes"),
+        ]
+        if encoding is not None:
+            headers.append(("Content-Encoding", encoding))
+        return RouteBody(path, stat, etag, tuple(headers) + validators, validators)
+
+    def build_route(self, path: str) -> Route:
+        stat = os.stat(path)
+        content_type = self.guess_type(path)
+        gzip = None
+        if is_compressible(path):
+            try:
+                gz_stat = os.stat(f"{path}.gz")
+            except OSError:
+                gz_stat = None
+            if gz_stat is not None and is_fresh_variant(stat, gz_stat):
+                gzip = self.route_body(
+                    f"{path}.gz", gz_stat, path, stat, content_type, "gzip", True
+                )
+        body = self.route_body(
+            path, stat, path, stat, content_type, None, gzip is not None
+        )
+        return Route(path, content_type, body, gzip)
+
+    def scan(self):
+        # returns the routes and the mtime of every directory and manifest;
+        # adding, removing or renaming a file changes the mtime of its directory
+        routes = {}
+        signature = {
+            path: _mtime_ns(path)
+            for path in (
+                os.path.join(self.directory, ETAG_MANIFEST_NAME),
+                os.path.join(self.directory, ASSET_MANIFEST_NAME),
+            )
+        }
+        pending = [self.directory]
+        while pending:
+            dir_path = pending.pop()
+            try:
+                signature[dir_path] = os.stat(dir_path).st_mtime_ns
+                with os.scandir(dir_path) as entries:
+                    entries = list(entries)
+            except OSError:
+                continue
+            rel_dir = os.path.relpath(dir_path, self.directory).replace(os.sep, "/")
+            url_dir = "/" if rel_dir == "." else f"/{rel_dir}/"
+            for entry in entries:
+                if entry.is_dir():
+                    pending.append(entry.path)
+                elif entry.is_file():
+                    try:
+                        route = self.build_route(entry.path)
+                    except OSError:
+                        continue
+                    routes[url_dir + entry.name] = route
+                    if entry.name == "index.html":
+                        routes[url_dir] = route
+                        if url_dir != "/":
+                            routes[url_dir.rstrip("/")] = route
+        return routes, signature
+
+    def refresh(self):
+        with self.lock:
+            self.stale = False
+            self.etags = load_etag_manifest(self.directory)
+            self.immutable_paths = load_immutable_paths(self.directory)
+            self.routes, self.signature = self.scan()
+
+    def has_changed(self) -> bool:
+        return self.stale or any(
+            _mtime_ns(path) != mtime for path, mtime in self.signature.items()
+        )
+
+    def watch(self):
+        # runs on a daemon thread; the routes are swapped whole, so requests
+        # see the old routes or the new ones and never need a lock
+        while True:
+            time.sleep(self.refresh_interval)
+            if self.has_changed():
+                self.refresh()
+
+    def start(self):
+        threading.Thread(target=self.watch, name="route-table", daemon=True).start()
+
+
+class RoutedHTTPRequestHandler(CachingHTTPRequestHandler):
+    # persistent connections: every response carries a Content-Length, and an
+    # idle connection gives its thread back after the timeout. Headers and body
+    # are separate sends, which Nagle's algorithm would hold back for the ACK
+    # of the previous response on a reused connection
+    protocol_version = "HTTP/1.1"
+    timeout = 15
+    disable_nagle_algorithm = True
+
+    def __init__(self, *args, route_table: RouteTable, **kwargs):
+        self.route_table = route_table
+        super().__init__(*args, **kwargs)
+
+    def resolve_file(self) -> Optional[str]:
+        self.route = self.route_table.lookup(unquote(urlsplit(self.path).path))
+        if self.route is None:
+            return super().resolve_file()
+        return self.route.path
+
+    def guess_type(self, path):
+        if self.route is not None and path == self.route.path:
+            return self.route.content_type
+        return super().guess_type(path)
+
+    def select_route_body(self, route: Route) -> Optional[RouteBody]:
+        # the precomputed headers hold while the file and the variant picked
+        # are what the table saw; otherwise the request takes the general path
+        body = route.body
+        if route.gzip is not None and accepts_encoding(
+            self.headers.get("Accept-Encoding"), "gzip"
+        ):
+            body = route.gzip
+        if not route.body.is_current() or not body.is_current():
+            self.route_table.stale = True
+            return None
+        return body
+
+    def send_route_headers(self, headers: Tuple[Tuple[str, str], ...]):
+        for name, value in headers:
+            self.send_header(name, value)
         self.end_headers()
 
+    def send_head(self):
+        self.route = None
+        self.body_parts = None
+        self.body_trailer = b""
+        # the manifests are reloaded with the table
+        self.etags = self.route_table.etags
+        self.immutable_paths = self.route_table.immutable_paths
+        route = self.route_table.lookup(unquote(urlsplit(self.path).path))
+        body = None
+        if route is not None and "Range" not in self.headers:
+            body = self.select_route_body(route)
+        if body is not None:
+            if self.is_not_modified(body.etag, route.body.stat):
+                self.send_response(HTTPStatus.NOT_MODIFIED)
+                self.send_route_headers(body.validators)
+                return None
+            source, length = self.open_body(body.path, body.stat)
+            if length == body.stat.st_size:
+                self.body_parts = [(b"", 0, length)]
+                self.send_response(HTTPStatus.OK)
+                self.send_route_headers(body.headers)
+                return source
+            # rewritten since the stat, the general path measures it again
+            source.close()
+        try:
+            return super().send_head()
+        except FileNotFoundError:
+            # removed since the table was built, nothing has been sent yet
+            if self.route is None:
+                raise
+            self.route_table.refresh()
+            return super().send_head()
+
+
+class ProductionHTTPServer(ThreadingHTTPServer):
+    request_queue_size = 128
+
 
 def run(
     server_class=HTTPServer,
     handler_class=CORSHTTPRequestHandler,
     port=8000,
     directory=None,
+    routes=False,
 ):
     if directory:  # Change the current working directory if directory is specified
         os.chdir(directory)
     server_address = ("", port)
+    handler_class = partial(
+        handler_class,
+        etags=load_etag_manifest(os.getcwd()),
+        immutable_paths=load_immutable_paths(os.getcwd()),
+    )
+    if routes:
+        # guess_type only reads class attributes, the same answer as per request
+        route_table = RouteTable(
+            os.getcwd(),
+            partial(SimpleHTTPRequestHandler.guess_type, SimpleHTTPRequestHandler),
+        )
+        route_table.start()
+        handler_class = partial(handler_class, route_table=route_table)
     httpd = server_class(server_address, handler_class)
     print(f"Serving HTTP on http://localhost:{port} from directory '{directory}'...")
     httpd.serve_forever()
@@ -35,6 +666,30 @@ if __name__ == "__main__":
         "--dir", type=str, help="Directory to serve files from", default="."
     )
     parser.add_argument("--port", type=int, help="Port to serve HTTP on", default=8888)
+    parser.add_argument(
+        "--production",
+        action="store_true",
+        help="Serve from a thread per connection with keep-alive, a route table "
+        "and an in-memory file cache",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        help="Size cap of the in-memory file cache in MB",
+        default=64,
+    )
     args = parser.parse_args()
 
-    run(port=args.port, directory=args.dir)
+    if args.production:
+        run(
+            server_class=ProductionHTTPServer,
+            handler_class=partial(
+                RoutedHTTPRequestHandler,
+                file_cache=FileCache(args.cache_size * 1024 * 1024),
+            ),
+            port=args.port,
+            directory=args.dir,
+            routes=True,
+        )
+    else:
+        run(port=args.port, directory=args.dir)
@@ -1,12 +1,18 @@
 from enum import Enum
-from functools import reduce
+import hashlib
+import json
+import mmap
+import os
 import re
-from typing import List
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
 
-from htmlnode import LeafNode, ParentNode
-from textnode import text_node_to_html_node
+from htmlnode import HtmlNode, LeafNode, ParentNode
+from profiling import stage
+from render_cache import BlockRenderCache
+from textnode import TEXT_HTML_RENDERERS, TEXT_RENDERERS, text_node_to_html_node
 
 from inline_markdown import (
+    inline_markdown_to_html,
     text_to_textnodes,
 )
 
@@ -20,124 +26,385 @@ class BlockType(Enum):
     ORDERED_LIST = 6
 
 
+# a blank line, together with any whitespace around it
+BLOCK_SEPARATOR_PATTERN = re.compile(r"\n\s*\n")
+# the same separator in UTF-8: a bytes \s only knows ASCII whitespace, so every
+# character the str \s matches is spelled out, NBSP and U+2003 included. None
+# lie above U+3000
+UTF8_WHITESPACE = [
+    chr(code).encode() for code in range(0x3001) if chr(code).isspace()
+]
+BYTES_BLOCK_SEPARATOR_PATTERN = re.compile(
+    rb"\n(?:["
+    + b"".join(re.escape(space) for space in UTF8_WHITESPACE if len(space) == 1)
+    + rb"]|"
+    + b"|".join(re.escape(space) for space in UTF8_WHITESPACE if len(space) > 1)
+    + rb")*\n"
+)
+FENCE_LINE_PATTERN = re.compile(r"^.*```.*$", re.MULTILINE)
+
+
+def _fence_is_open(segment: str, in_fence: bool) -> bool:
+    for line in FENCE_LINE_PATTERN.findall(segment):
+        if in_fence:
+            in_fence = not line.rstrip(" ").endswith("```")
+        else:
+            stripped_line = line.strip(" ")
+            in_fence = stripped_line.startswith("```") and (
+                len(stripped_line) < 6 or not stripped_line.endswith("```")
+            )
+    return in_fence
+
+
+def _iter_blocks(segments: Iterable[str]) -> Iterator[str]:
+    # segments are the text between blank lines; one that leaves a code fence
+    # open keeps the following segments in the same block, so the blank lines
+    # inside the fence are dropped
+    pending: List[str] = []
+    in_fence = False
+    for segment in segments:
+        if "```" in segment:
+            in_fence = _fence_is_open(segment, in_fence)
+        if in_fence:
+            pending.append(segment)
+            continue
+        if pending:
+            pending.append(segment)
+            segment = "\n".join(pending)
+            pending = []
+        block = segment.strip(" \n")
+        if block:
+            yield block
+
+    # a fence left open at the end of the document
+    block = "\n".join(pending).strip(" \n")
+    if block:
+        yield block
+
+
+def _iter_file_segments(mapped: mmap.mmap) -> Iterator[str]:
+    start = 0
+    for match in BYTES_BLOCK_SEPARATOR_PATTERN.finditer(mapped):
+        yield _decode_segment(mapped[start : match.start()])
+        start = match.end()
+    yield _decode_segment(mapped[start:])
+
+
+def _decode_segment(segment: bytes) -> str:
+    # line endings are normalized the way a text mode read would
+    return segment.decode().replace("\r\n", "\n").removesuffix("\r")
+
+
+def iter_markdown_blocks(markdown: str) -> Iterator[str]:
+    # the document is in memory already, so it is split in one go
+    return _iter_blocks(BLOCK_SEPARATOR_PATTERN.split(markdown))
+
+
+def iter_markdown_file_blocks(path: str) -> Iterator[str]:
+    # scans a memory map of the file, so only the block being yielded is ever
+    # decoded and held in memory
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield from _iter_blocks(_iter_file_segments(mapped))
+
+
 def markdown_to_blocks(markdown: str) -> List[str]:
-    blocks = re.split(r"\n\s*\n+", markdown)
-    filtered_blocks = []
-    for block in blocks:
-        stripped_block = block.strip(" \n")
-
-        is_code_block_start = stripped_block.startswith("```")
-        is_code_block_end = stripped_block.endswith("```")
-        if is_code_block_end:
-            if not is_code_block_start and is_code_block_end:
-                filtered_blocks[-1] += f"\n{stripped_block}"
-                continue
-        if stripped_block:
-            filtered_blocks.append(stripped_block)
-
-    return filtered_blocks
-
-
-def get_block_type(block: str) -> BlockType:
-    if re.match(r"#{1,6} ", block):
-        return BlockType.HEADING
+    return list(iter_markdown_blocks(markdown))
+
+
+HEADING_PATTERN = re.compile(r"#{1,6} ")
+ORDERED_ITEM_PATTERN = re.compile(r"\d. ")
+UNORDERED_ITEM_MARKERS = ("* ", "- ")
+
+
+# first character of a block -> extension classifiers for blocks starting with
+# it, tried in order before the built in block types; each returns None or the
+# block type and the lines its renderer gets. A block only meets the
+# classifiers of its own first character, however many are registered
+BLOCK_CLASSIFIERS: Dict[
+    str, List[Callable[[str], Optional[Tuple[Enum, List[str]]]]]
+] = {}
+
+
+def classify_block(block: str) -> Tuple[Enum, List[str]]:
+    # decides the type in one pass over the lines and returns them with their
+    # quote or list markers removed, so rendering does not parse them again
+    for classifier in BLOCK_CLASSIFIERS.get(block[:1], ()):
+        classified = classifier(block)
+        if classified is not None:
+            return classified
+
+    if HEADING_PATTERN.match(block):
+        return BlockType.HEADING, [block]
     if block.startswith("```") and block.endswith("```"):
-        return BlockType.CODE
+        return BlockType.CODE, block.splitlines()[1:-1]
 
-    block_lines = block.split("\n")
-    if reduce(
-        lambda value, line: (line.startswith("> ") if value is True else False),
-        block_lines,
-        True,
-    ):
-        return BlockType.QUOTE
-    if reduce(
-        lambda value, line: (
-            (line.startswith("* ") or line.startswith("- ")) if value is True else False
-        ),
-        block_lines,
-        True,
-    ):
-        return BlockType.UNORDERED_LIST
-    if reduce(
-        lambda value, line: (
-            re.match(r"^\d. ", line) is not None if value is True else False
-        ),
-        block_lines,
-        True,
-    ):
-        return BlockType.ORDERED_LIST
-    return BlockType.PARAGRAPH
-
-
-def markdown_to_htmlnode(markdown: str) -> ParentNode:
-    blocks = markdown_to_blocks(markdown)
-    html_nodes = []
-
-    for text_block in blocks:
-        block_type = get_block_type(text_block)
-        if block_type == BlockType.PARAGRAPH:
-            lines = text_block.split("\n")
-            paragraph_content = " ".join(lines)
-            text_nodes = text_to_textnodes(paragraph_content)
-            paragraph_node = ParentNode("p", [], {})
-            paragraph_node.add_children(
-                list(
-                    map(lambda text_node: text_node_to_html_node(text_node), text_nodes)
-                )
-            )
-            html_nodes.append(paragraph_node)
-        if block_type == BlockType.QUOTE:
-            block_text = " ".join(
-                map(lambda line: line.lstrip("> "), text_block.split("\n"))
-            )
+    lines = block.split("\n")
+    items = []
+    # the markers exclude each other, so the first line picks the only type
+    # the block can still be
+    first_line = lines[0]
+    if first_line.startswith("> "):
+        for line in lines:
+            if not line.startswith("> "):
+                return BlockType.PARAGRAPH, lines
+            items.append(line.lstrip("> "))
+        return BlockType.QUOTE, items
+    if first_line.startswith(UNORDERED_ITEM_MARKERS):
+        for line in lines:
+            if not line.startswith(UNORDERED_ITEM_MARKERS):
+                return BlockType.PARAGRAPH, lines
+            items.append(line[2:])
+        return BlockType.UNORDERED_LIST, items
+    if ORDERED_ITEM_PATTERN.match(first_line):
+        for line in lines:
+            if ORDERED_ITEM_PATTERN.match(line) is None:
+                return BlockType.PARAGRAPH, lines
+            items.append(line[3:])
+        return BlockType.ORDERED_LIST, items
+    return BlockType.PARAGRAPH, lines
 
-            text_nodes = text_to_textnodes(block_text)
-            paragraph_node = ParentNode("p", [], {})
-            paragraph_node.add_children(
-                list(
-                    map(lambda text_node: text_node_to_html_node(text_node), text_nodes)
-                )
-            )
-            html_nodes.append(ParentNode("blockquote", [paragraph_node]))
-        if block_type == BlockType.CODE:
-            html_nodes.append(
-                ParentNode(
-                    "pre", [LeafNode("code", "\n".join(text_block.splitlines()[1:-1]))]
-                )
-            )
-        if block_type == BlockType.HEADING:
-            block_text = text_block.lstrip("#")
-            heading_level = len(text_block) - len(block_text)
-            block_text = block_text.lstrip()
-            html_nodes.append(LeafNode(f"h{heading_level}", block_text))
-        if block_type == BlockType.UNORDERED_LIST:
-            list_items_text_nodes = map(
-                lambda text_segment: text_to_textnodes(text_segment[2:]),
-                text_block.split("\n"),
-            )
 
-            list_items_html_nodes = []
-            for list_item_text_nodes in list_items_text_nodes:
-                list_item_html_nodes = []
-                for text_node in list_item_text_nodes:
-                    list_item_html_nodes.append(text_node_to_html_node(text_node))
-                list_items_html_nodes.append(ParentNode("li", list_item_html_nodes))
-
-            html_nodes.append(ParentNode("ul", list_items_html_nodes))
-        if block_type == BlockType.ORDERED_LIST:
-            list_items_text_nodes = map(
-                lambda text_segment: text_to_textnodes(text_segment[3:]),
-                text_block.split("\n"),
-            )
+def get_block_type(block: str) -> Enum:
+    return classify_block(block)[0]
+
+
+def text_to_html_nodes(text: str) -> List[HtmlNode]:
+    return [
+        text_node_to_html_node(text_node) for text_node in text_to_textnodes(text)
+    ]
+
+
+def paragraph_block_to_htmlnode(text_block: str, lines: List[str]) -> HtmlNode:
+    return ParentNode("p", text_to_html_nodes(" ".join(lines)), {})
+
+
+def quote_block_to_htmlnode(text_block: str, lines: List[str]) -> HtmlNode:
+    paragraph_node = ParentNode("p", text_to_html_nodes(" ".join(lines)), {})
+    return ParentNode("blockquote", [paragraph_node])
+
+
+def code_block_to_htmlnode(text_block: str, lines: List[str]) -> HtmlNode:
+    return ParentNode("pre", [LeafNode("code", "\n".join(lines))])
 
-            list_items_html_nodes = []
-            for list_item_text_nodes in list_items_text_nodes:
-                list_item_html_nodes = []
-                for text_node in list_item_text_nodes:
-                    list_item_html_nodes.append(text_node_to_html_node(text_node))
-                list_items_html_nodes.append(ParentNode("li", list_item_html_nodes))
 
-            html_nodes.append(ParentNode("ol", list_items_html_nodes))
+def heading_block_to_htmlnode(text_block: str, lines: List[str]) -> HtmlNode:
+    block_text = text_block.lstrip("#")
+    heading_level = len(text_block) - len(block_text)
+    block_text = block_text.lstrip()
+    return LeafNode(f"h{heading_level}", block_text)
+
+
+def list_block_to_htmlnode(tag: str, items: List[str]) -> ParentNode:
+    return ParentNode(
+        tag, [ParentNode("li", text_to_html_nodes(item)) for item in items]
+    )
+
+
+# block type -> renderer taking the block and its classified lines, one dict
+# lookup per block however many are registered
+BLOCK_RENDERERS: Dict[Enum, Callable[[str, List[str]], HtmlNode]] = {
+    BlockType.PARAGRAPH: paragraph_block_to_htmlnode,
+    BlockType.QUOTE: quote_block_to_htmlnode,
+    BlockType.CODE: code_block_to_htmlnode,
+    BlockType.HEADING: heading_block_to_htmlnode,
+    BlockType.UNORDERED_LIST: lambda text_block, items: list_block_to_htmlnode(
+        "ul", items
+    ),
+    BlockType.ORDERED_LIST: lambda text_block, items: list_block_to_htmlnode(
+        "ol", items
+    ),
+}
+
+
+def paragraph_block_to_html(text_block: str, lines: List[str]) -> str:
+    return f"<p>{inline_markdown_to_html(' '.join(lines))}</p>"
+
+
+def quote_block_to_html(text_block: str, lines: List[str]) -> str:
+    return f"<blockquote><p>{inline_markdown_to_html(' '.join(lines))}</p></blockquote>"
+
+
+def code_block_to_html(text_block: str, lines: List[str]) -> str:
+    code = "\n".join(lines)
+    return f"<pre><code>{code}</code></pre>"
+
+
+def heading_block_to_html(text_block: str, lines: List[str]) -> str:
+    block_text = text_block.lstrip("#")
+    heading_level = len(text_block) - len(block_text)
+    return f"<h{heading_level}>{block_text.lstrip()}</h{heading_level}>"
+
+
+def list_block_to_html(tag: str, items: List[str]) -> str:
+    list_items = "".join(f"<li>{inline_markdown_to_html(item)}</li>" for item in items)
+    return f"<{tag}>{list_items}</{tag}>"
+
+
+# block type -> markup built straight from the classified lines, for the fast
+# path that skips the node trees; must match what the node renderer emits
+BLOCK_HTML_RENDERERS: Dict[Enum, Callable[[str, List[str]], str]] = {
+    BlockType.PARAGRAPH: paragraph_block_to_html,
+    BlockType.QUOTE: quote_block_to_html,
+    BlockType.CODE: code_block_to_html,
+    BlockType.HEADING: heading_block_to_html,
+    BlockType.UNORDERED_LIST: lambda text_block, items: list_block_to_html(
+        "ul", items
+    ),
+    BlockType.ORDERED_LIST: lambda text_block, items: list_block_to_html(
+        "ol", items
+    ),
+}
+
+
+def register_block_renderer(
+    block_type: Enum,
+    renderer: Callable[[str, List[str]], HtmlNode],
+    classifier: Optional[Callable[[str], Optional[Tuple[Enum, List[str]]]]] = None,
+    html_renderer: Optional[Callable[[str, List[str]], str]] = None,
+    first_chars: str = "",
+):
+    # block types are enum members, extensions bring their own enum and a
+    # classifier that recognizes their blocks, together with the characters
+    # those blocks start with; without an html_renderer the fast path goes
+    # through the node renderer
+    if classifier is not None and not first_chars:
+        raise ValueError("A block classifier needs the first characters it handles")
+    BLOCK_RENDERERS[block_type] = renderer
+    if html_renderer is None:
+        BLOCK_HTML_RENDERERS.pop(block_type, None)
+    else:
+        BLOCK_HTML_RENDERERS[block_type] = html_renderer
+    if classifier is not None:
+        for char in first_chars:
+            BLOCK_CLASSIFIERS.setdefault(char, []).append(classifier)
+
+
+def _qualified_name(function: Callable) -> str:
+    return f"{function.__module__}.{function.__qualname__}"
+
+
+def renderer_registry_digest() -> str:
+    # names every registered renderer and classifier, so an on-disk block cache
+    # salted with it is not reused after extensions change
+    registries = [
+        sorted(
+            f"{type_!r}={_qualified_name(renderer)}"
+            for type_, renderer in registry.items()
+        )
+        for registry in (
+            BLOCK_RENDERERS,
+            BLOCK_HTML_RENDERERS,
+            TEXT_RENDERERS,
+            TEXT_HTML_RENDERERS,
+        )
+    ]
+    registries.append(
+        sorted(
+            f"{char}={','.join(map(_qualified_name, classifiers))}"
+            for char, classifiers in BLOCK_CLASSIFIERS.items()
+        )
+    )
+    return hashlib.sha256(json.dumps(registries).encode()).hexdigest()
+
+
+def block_to_htmlnode(text_block: str) -> HtmlNode:
+    block_type, lines = classify_block(text_block)
+    renderer = BLOCK_RENDERERS.get(block_type)
+    if renderer is None:
+        raise ValueError(f"Invalid block type: {block_type}")
+    return renderer(text_block, lines)
+
+
+def block_to_html(text_block: str) -> str:
+    block_type, lines = classify_block(text_block)
+    html_renderer = BLOCK_HTML_RENDERERS.get(block_type)
+    if html_renderer is not None:
+        return html_renderer(text_block, lines)
+    renderer = BLOCK_RENDERERS.get(block_type)
+    if renderer is None:
+        raise ValueError(f"Invalid block type: {block_type}")
+    return renderer(text_block, lines).to_html()
+
+
+def render_block(
+    text_block: str, cache: Optional[BlockRenderCache] = None
+) -> HtmlNode:
+    if cache is None:
+        with stage("block_parse"):
+            return block_to_htmlnode(text_block)
+
+    # cached blocks come back as their rendered markup, wrapped in a tagless
+    # leaf that to_html emits verbatim
+    html = cache.get(text_block)
+    if html is None:
+        with stage("block_parse"):
+            html = block_to_htmlnode(text_block).to_html()
+        cache.put(text_block, html)
+    return LeafNode(None, html)
+
+
+def render_block_html(
+    text_block: str, cache: Optional[BlockRenderCache] = None
+) -> str:
+    # both paths emit the same markup, so they share cache entries
+    if cache is None:
+        with stage("block_parse"):
+            return block_to_html(text_block)
+
+    html = cache.get(text_block)
+    if html is None:
+        with stage("block_parse"):
+            html = block_to_html(text_block)
+        cache.put(text_block, html)
+    return html
+
+
+def markdown_to_htmlnode(
+    markdown: str, cache: Optional[BlockRenderCache] = None
+) -> ParentNode:
+    with stage("block_split"):
+        blocks = markdown_to_blocks(markdown)
+    return ParentNode("div", [render_block(block, cache) for block in blocks], {})
+
+
+def markdown_to_html(markdown: str, cache: Optional[BlockRenderCache] = None) -> str:
+    # same markup as markdown_to_htmlnode(markdown).to_html(), without building
+    # the text and html node trees on the way
+    with stage("block_split"):
+        blocks = markdown_to_blocks(markdown)
+    return f"<div>{''.join(render_block_html(block, cache) for block in blocks)}</div>"
+
+
+class MarkdownFileNode(HtmlNode):
+    # renders a Markdown file one block at a time while it is written out, so
+    # memory is bounded by the largest block rather than the whole document;
+    # fast renders each block with the direct markup path
+    __slots__ = ("path", "cache", "fast")
+
+    def __init__(
+        self,
+        path: str,
+        cache: Optional[BlockRenderCache] = None,
+        fast: bool = False,
+    ):
+        super().__init__("div")
+        self.path = path
+        self.cache = cache
+        self.fast = fast
 
-    return ParentNode("div", html_nodes, {})
+    def write_to(self, fp: TextIO):
+        fp.write("<div>")
+        blocks = iter_markdown_file_blocks(self.path)
+        while True:
+            with stage("block_split"):
+                text_block = next(blocks, None)
+            if text_block is None:
+                break
+            if self.fast:
+                fp.write(render_block_html(text_block, self.cache))
+            else:
+                render_block(text_block, self.cache).write_to(fp)
+        fp.write("</div>")
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+MANIFEST_VERSION = 1
+
+
+def hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as target:
+        for chunk in iter(lambda: target.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def empty_manifest() -> Dict:
+    return {
+        "version": MANIFEST_VERSION,
+        "template_hash": None,
+        "pages": {},
+        "static": [],
+    }
+
+
+def load_manifest(path: str) -> Dict:
+    if not os.path.exists(path):
+        return empty_manifest()
+    try:
+        with open(path) as target:
+            manifest = json.load(target)
+    except (OSError, ValueError):
+        return empty_manifest()
+    if manifest.get("version") != MANIFEST_VERSION:
+        return empty_manifest()
+    return manifest
+
+
+def save_manifest(path: str, manifest: Dict):
+    # write next to the target and rename, so an interrupted build never leaves
+    # a truncated manifest behind
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as target:
+        json.dump(manifest, target, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def page_record(
+    src_path: str, dest_path: str, stat: Optional[os.stat_result] = None
+) -> Dict:
+    if stat is None:
+        stat = os.stat(src_path)
+    return {
+        "hash": hash_file(src_path),
+        "mtime": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "dest": dest_path,
+    }
+
+
+class IncrementalPlan:
+    # decides page by page which jobs have to be rendered, so the decision can
+    # run over a lazily discovered tree and hand jobs on as it goes. render_key
+    # stands for any other input every page depends on, changing it
+    # invalidates every page just like a template change, and so does
+    # rebuild_all
+    def __init__(
+        self,
+        template_path: str,
+        manifest: Dict,
+        render_key: str = "",
+        rebuild_all: bool = False,
+    ):
+        template_hash = hash_file(template_path)
+        if render_key:
+            template_hash = hashlib.sha256(f"{template_hash}{render_key}".encode())
+            template_hash = template_hash.hexdigest()
+        self.template_hash = template_hash
+        self.template_changed = (
+            rebuild_all or manifest.get("template_hash") != template_hash
+        )
+        self.old_pages = manifest.get("pages", {})
+        self.new_pages: Dict[str, Dict] = {}
+
+    def is_stale(self, src_path: str, dest_path: str) -> bool:
+        stat = os.stat(src_path)
+        record = self.old_pages.get(src_path)
+        is_reusable = (
+            record is not None
+            and not self.template_changed
+            and record["dest"] == dest_path
+            and os.path.exists(dest_path)
+        )
+
+        # mtime and size match: trust the recorded hash without reading the file
+        if (
+            is_reusable
+            and record["mtime"] == stat.st_mtime_ns
+            and record["size"] == stat.st_size
+        ):
+            self.new_pages[src_path] = record
+            return False
+
+        self.new_pages[src_path] = page_record(src_path, dest_path, stat)
+        return not (is_reusable and record["hash"] == self.new_pages[src_path]["hash"])
+
+    def stale_jobs(
+        self, page_jobs: Iterable[Tuple[str, str]]
+    ) -> Iterator[Tuple[str, str]]:
+        for src_path, dest_path in page_jobs:
+            if self.is_stale(src_path, dest_path):
+                yield src_path, dest_path
+
+    def finish(self) -> Tuple[List[str], Dict]:
+        # once every job went through stale_jobs: the outputs whose sources are
+        # gone and the manifest describing the tree once the build succeeded
+        live_outputs = {record["dest"] for record in self.new_pages.values()}
+        removed_outputs = [
+            record["dest"]
+            for src_path, record in self.old_pages.items()
+            if src_path not in self.new_pages and record["dest"] not in live_outputs
+        ]
+        new_manifest = {
+            "version": MANIFEST_VERSION,
+            "template_hash": self.template_hash,
+            "pages": self.new_pages,
+        }
+        return removed_outputs, new_manifest
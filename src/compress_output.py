@@ -0,0 +1,93 @@
+from collections import Counter
+import gzip
+import os
+from typing import Iterable, List, Tuple
+
+COMPRESSIBLE_EXTENSIONS = (
+    ".html",
+    ".css",
+    ".js",
+    ".mjs",
+    ".json",
+    ".svg",
+    ".txt",
+    ".xml",
+    ".map",
+)
+
+
+def is_compressible(path: str) -> bool:
+    return path.endswith(COMPRESSIBLE_EXTENSIONS)
+
+
+def is_fresh_variant(src_stat: os.stat_result, variant_stat: os.stat_result) -> bool:
+    # variants carry their source's mtime, so any rebuild of the source makes
+    # the variant stale until the next precompress run
+    return variant_stat.st_mtime_ns == src_stat.st_mtime_ns
+
+
+def precompress_file(path: str, min_size: int = 1024, level: int = 9) -> str:
+    gz_path = f"{path}.gz"
+    stat = os.stat(path)
+    try:
+        gz_stat = os.stat(gz_path)
+    except FileNotFoundError:
+        gz_stat = None
+
+    if stat.st_size < min_size:
+        if gz_stat is not None:
+            os.remove(gz_path)
+        return "skipped"
+    if gz_stat is not None and is_fresh_variant(stat, gz_stat):
+        return "unchanged"
+
+    with open(path, "rb") as file:
+        data = file.read()
+    # mtime=0 keeps the output byte-identical between builds
+    compressed = gzip.compress(data, compresslevel=level, mtime=0)
+    if len(compressed) >= len(data):
+        if gz_stat is not None:
+            os.remove(gz_path)
+        return "skipped"
+
+    tmp_path = f"{gz_path}.tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(compressed)
+    os.utime(tmp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    os.replace(tmp_path, gz_path)
+    return "compressed"
+
+
+def precompress_tree(
+    root: str,
+    min_size: int = 1024,
+    level: int = 9,
+    previous_variants: Iterable[str] = (),
+) -> Tuple[List[str], Counter]:
+    # returns the variants present afterwards, relative to root, to be passed
+    # back as previous_variants next time. Only those are ever removed as
+    # orphans, so a .gz that came with the static files is left alone
+    stats = Counter(compressed=0, unchanged=0, skipped=0, removed=0)
+    variants = []
+    for dir_path, _, file_names in os.walk(root):
+        for file_name in file_names:
+            if is_compressible(file_name):
+                path = os.path.join(dir_path, file_name)
+                result = precompress_file(path, min_size, level)
+                stats[result] += 1
+                if result != "skipped":
+                    variants.append(os.path.relpath(f"{path}.gz", root))
+
+    current_variants = set(variants)
+    for rel_path in previous_variants:
+        path = os.path.join(root, rel_path)
+        # drop variants whose source is gone
+        if (
+            rel_path not in current_variants
+            and is_compressible(rel_path[:-3])
+            and not os.path.exists(path[:-3])
+            and os.path.exists(path)
+        ):
+            os.remove(path)
+            stats["removed"] += 1
+    return variants, stats
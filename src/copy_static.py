@@ -1,17 +1,126 @@
+from collections import Counter
 import os
 import shutil
+from typing import Dict, Iterable, List, Optional, Tuple
 
+from build_manifest import hash_file
+from discovery import iter_files
+from output_writer import remove_empty_dirs
 
-# Note: Yes, I know there is a shutil.copytree function that would eliminate the need for recursion entirely, but like, do you want to just download Hugo and skip this project? No! We go to the moon, not because it is easy, but because it is hard!
-def copy_static_recursive(src: str, dest: str):
-    if not os.path.exists(dest):
-        os.mkdir(dest)
-    dir_contents = os.listdir(src)
-    for content in dir_contents:
-        content_path = os.path.join(src, content)
-        dest_path = os.path.join(dest, content)
-        print(f" * {content_path} -> {dest_path}")
-        if os.path.isfile(content_path):
-            shutil.copy(content_path, dest_path)
+
+# FICLONE from linux/fs.h: share the source extents instead of copying bytes
+FICLONE = 0x40049409
+
+
+def _reflink(src_path: str, dest_path: str) -> bool:
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        with open(src_path, "rb") as src_file, open(dest_path, "wb") as dest_file:
+            fcntl.ioctl(dest_file.fileno(), FICLONE, src_file.fileno())
+    except OSError:
+        return False
+    shutil.copystat(src_path, dest_path)
+    return True
+
+
+def _install_file(src_path: str, dest_path: str, hardlink: bool):
+    if os.path.lexists(dest_path):
+        os.remove(dest_path)
+    if hardlink:
+        try:
+            os.link(src_path, dest_path)
+            return
+        except OSError:
+            pass
+    if not _reflink(src_path, dest_path):
+        shutil.copy2(src_path, dest_path)
+
+
+def _is_unchanged(
+    src_path: str, src_stat: os.stat_result, dest_path: str, use_hash: bool
+) -> bool:
+    try:
+        dest_stat = os.stat(dest_path)
+    except FileNotFoundError:
+        return False
+    if os.path.samestat(src_stat, dest_stat):
+        return True
+    if src_stat.st_size != dest_stat.st_size:
+        return False
+    if src_stat.st_mtime_ns == dest_stat.st_mtime_ns:
+        return True
+    if use_hash and hash_file(src_path) == hash_file(dest_path):
+        # same bytes, only the mtime drifted: fix it so the next run is cheap
+        shutil.copystat(src_path, dest_path)
+        return True
+    return False
+
+
+def sync_static_file(
+    src: str,
+    dest: str,
+    rel_path: str,
+    use_hash: bool = False,
+    hardlink: bool = False,
+    dest_names: Optional[Dict[str, str]] = None,
+) -> str:
+    # syncs a single path below src, as reported by a file watcher
+    src_path = os.path.join(src, rel_path)
+    dest_path = os.path.join(dest, (dest_names or {}).get(rel_path, rel_path))
+    if not os.path.isfile(src_path):
+        if os.path.lexists(dest_path):
+            os.remove(dest_path)
+            remove_empty_dirs(os.path.dirname(dest_path), dest)
+            return "removed"
+        return "unchanged"
+    if _is_unchanged(src_path, os.stat(src_path), dest_path, use_hash):
+        return "unchanged"
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    _install_file(src_path, dest_path, hardlink)
+    return "copied"
+
+
+def sync_static(
+    src: str,
+    dest: str,
+    previous_files: Iterable[str] = (),
+    use_hash: bool = False,
+    hardlink: bool = False,
+    dest_names: Optional[Dict[str, str]] = None,
+) -> Tuple[List[str], Counter]:
+    # returns the synced paths relative to dest, to be passed back as
+    # previous_files next time, so only files this function put there are
+    # ever removed as orphans. dest_names renames files on the way, keyed by
+    # their path relative to src
+    dest_names = dest_names or {}
+    stats = Counter(copied=0, unchanged=0, removed=0)
+    synced_files = []
+    made_dirs = set()
+    os.makedirs(dest, exist_ok=True)
+    for rel_path, entry in iter_files(src):
+        dest_rel_path = dest_names.get(rel_path, rel_path)
+        dest_path = os.path.join(dest, dest_rel_path)
+        synced_files.append(dest_rel_path)
+        if _is_unchanged(entry.path, entry.stat(), dest_path, use_hash):
+            stats["unchanged"] += 1
+            continue
+        dest_dir = os.path.dirname(dest_path)
+        if dest_dir not in made_dirs:
+            os.makedirs(dest_dir, exist_ok=True)
+            made_dirs.add(dest_dir)
+        _install_file(entry.path, dest_path, hardlink)
+        stats["copied"] += 1
+
+    current_files = set(synced_files)
+    for rel_path in previous_files:
+        if rel_path in current_files:
             continue
-        copy_static_recursive(content_path, dest_path)
+        dest_path = os.path.join(dest, rel_path)
+        if os.path.lexists(dest_path):
+            os.remove(dest_path)
+            stats["removed"] += 1
+        remove_empty_dirs(os.path.dirname(dest_path), dest)
+    return synced_files, stats
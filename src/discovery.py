@@ -0,0 +1,58 @@
+import os
+from typing import Callable, Iterator, List, Optional, Tuple
+
+# editor swap, backup and probe files, and version control or OS metadata,
+# that never belong in the site and never trigger a rebuild
+IGNORED_SUFFIXES = ("~", ".swp", ".swx", ".tmp")
+IGNORED_PREFIXES = (".#",)
+IGNORED_NAMES = ("4913", ".DS_Store", ".git", ".hg", ".svn", "__pycache__")
+PAGE_SUFFIX = ".md"
+
+
+def is_ignored(path: str) -> bool:
+    name = os.path.basename(path)
+    return (
+        name.endswith(IGNORED_SUFFIXES)
+        or name.startswith(IGNORED_PREFIXES)
+        or name in IGNORED_NAMES
+    )
+
+
+def _sorted_entries(path: str) -> Iterator[os.DirEntry]:
+    # one directory at a time, sorted so that logs, job order and shards do
+    # not depend on the filesystem
+    with os.scandir(path) as entries:
+        return iter(sorted(entries, key=lambda entry: entry.name))
+
+
+def iter_files(
+    root: str,
+    ignore: Callable[[str], bool] = is_ignored,
+    suffix: Optional[str] = None,
+) -> Iterator[Tuple[str, os.DirEntry]]:
+    # yields (path relative to root, entry) for every file below root, depth
+    # first in name order. The walk keeps its own stack instead of recursing,
+    # and the entries carry the file type from the directory listing, so
+    # telling files from directories costs no stat call. ignore is checked
+    # against file and directory names, suffix only against files
+    stack: List[Tuple[Iterator[os.DirEntry], str]] = [(_sorted_entries(root), "")]
+    while stack:
+        entries, rel_dir = stack[-1]
+        entry = next(entries, None)
+        if entry is None:
+            stack.pop()
+            continue
+        if ignore(entry.name):
+            continue
+        rel_path = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+        if entry.is_dir():
+            stack.append((_sorted_entries(entry.path), rel_path))
+        elif entry.is_file() and (suffix is None or entry.name.endswith(suffix)):
+            yield rel_path, entry
+
+
+def iter_page_jobs(src_dir: str, dest_dir: str) -> Iterator[Tuple[str, str]]:
+    # (source, output) for every Markdown page, as the walk finds them
+    for rel_path, entry in iter_files(src_dir, suffix=PAGE_SUFFIX):
+        dest_path = os.path.join(dest_dir, rel_path[: -len(PAGE_SUFFIX)])
+        yield entry.path, f"{dest_path}.html"
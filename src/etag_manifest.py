@@ -0,0 +1,50 @@
+import json
+import os
+from typing import Dict
+
+from build_manifest import hash_file
+
+ETAG_MANIFEST_NAME = ".etags.json"
+
+
+def build_etag_manifest(root: str, previous: Dict[str, Dict]) -> Dict[str, Dict]:
+    # url path relative to root -> strong etag plus the size and mtime it was
+    # computed for, so the server can tell when an entry went stale
+    entries = {}
+    for dir_path, _, file_names in os.walk(root):
+        for file_name in file_names:
+            path = os.path.join(dir_path, file_name)
+            rel_path = os.path.relpath(path, root).replace(os.sep, "/")
+            if rel_path == ETAG_MANIFEST_NAME:
+                continue
+            stat = os.stat(path)
+            entry = previous.get(rel_path)
+            if entry is None or (entry["mtime"], entry["size"]) != (
+                stat.st_mtime_ns,
+                stat.st_size,
+            ):
+                entry = {
+                    "etag": f'"{hash_file(path)[:32]}"',
+                    "mtime": stat.st_mtime_ns,
+                    "size": stat.st_size,
+                }
+            entries[rel_path] = entry
+    return entries
+
+
+def load_etag_manifest(root: str) -> Dict[str, Dict]:
+    try:
+        with open(os.path.join(root, ETAG_MANIFEST_NAME)) as target:
+            return json.load(target)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_etag_manifest(root: str) -> int:
+    entries = build_etag_manifest(root, load_etag_manifest(root))
+    path = os.path.join(root, ETAG_MANIFEST_NAME)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as target:
+        json.dump(entries, target, sort_keys=True)
+    os.replace(tmp_path, path)
+    return len(entries)
@@ -0,0 +1,95 @@
+import hashlib
+import json
+import os
+import re
+from typing import Dict, Optional
+
+from build_manifest import hash_file
+from discovery import iter_files
+from output_writer import write_if_changed
+
+ASSET_MANIFEST_NAME = "asset-manifest.json"
+FINGERPRINT_LENGTH = 8
+# href/src attributes in the template, plus url() references in inline styles
+REFERENCE_PATTERN = re.compile(r"""((?:href|src)=["']|url\(["']?)(/[^"')\s?#]*)""")
+
+_asset_map: Dict[str, str] = {}
+
+
+def fingerprint_path(rel_path: str, digest: str) -> str:
+    root, extension = os.path.splitext(rel_path)
+    return f"{root}.{digest[:FINGERPRINT_LENGTH]}{extension}"
+
+
+def build_asset_map(static_dir: str) -> Dict[str, str]:
+    # "/images/a.png" -> "/images/a.3f2a1c9d.png" for every file in static_dir
+    asset_map = {}
+    for rel_path, entry in iter_files(static_dir):
+        url = "/" + rel_path.replace(os.sep, "/")
+        asset_map[url] = fingerprint_path(url, hash_file(entry.path))
+    return asset_map
+
+
+def asset_map_digest(asset_map: Optional[Dict[str, str]]) -> str:
+    if not asset_map:
+        return ""
+    return hashlib.sha256(json.dumps(asset_map, sort_keys=True).encode()).hexdigest()
+
+
+def asset_dest_names(asset_map: Dict[str, str]) -> Dict[str, str]:
+    # the same mapping as paths relative to the static and public directories
+    return {
+        os.path.normpath(url[1:]): os.path.normpath(fingerprinted_url[1:])
+        for url, fingerprinted_url in asset_map.items()
+    }
+
+
+def write_asset_manifest(public_dir: str, asset_map: Dict[str, str]):
+    write_if_changed(
+        os.path.join(public_dir, ASSET_MANIFEST_NAME),
+        json.dumps(asset_map, indent=2, sort_keys=True).encode(),
+    )
+
+
+def load_asset_manifest(public_dir: str) -> Dict[str, str]:
+    try:
+        with open(os.path.join(public_dir, ASSET_MANIFEST_NAME)) as file:
+            asset_map = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    return asset_map if isinstance(asset_map, dict) else {}
+
+
+def remove_asset_manifest(public_dir: str):
+    # left over from an earlier build with fingerprinting on
+    try:
+        os.remove(os.path.join(public_dir, ASSET_MANIFEST_NAME))
+    except FileNotFoundError:
+        pass
+
+
+def set_asset_map(asset_map: Optional[Dict[str, str]]):
+    global _asset_map
+    _asset_map = asset_map or {}
+
+
+def resolve_asset_url(url: str) -> str:
+    if not _asset_map or not url.startswith("/"):
+        return url
+    # keep query strings and fragments, "/index.css?v=1" stays addressable
+    split_at = len(url)
+    for separator in ("?", "#"):
+        index = url.find(separator)
+        if index != -1:
+            split_at = min(split_at, index)
+    path = url[:split_at]
+    return _asset_map.get(path, path) + url[split_at:]
+
+
+def rewrite_references(html: str) -> str:
+    if not _asset_map:
+        return html
+    return REFERENCE_PATTERN.sub(
+        lambda match: match.group(1) + _asset_map.get(match.group(2), match.group(2)),
+        html,
+    )
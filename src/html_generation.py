@@ -1,49 +1,279 @@
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import suppress
+from io import StringIO
+from itertools import chain, islice
 import os
+import time
+from typing import Deque, Dict, Iterable, NamedTuple, Optional, Tuple
 
-from block_markdown import markdown_to_htmlnode
+from block_markdown import MarkdownFileNode, renderer_registry_digest
+from discovery import iter_page_jobs
+from fingerprint import asset_map_digest, set_asset_map
+from output_writer import OutputWriteError, OutputWriter, write_if_changed
+from profiling import enable_profiling, get_profiler, record_page, stage
+from render_cache import STORE_MAX_ENTRIES, BlockRenderCache
+from shards import select_shard
+from template import load_template
 
 
-def extract_title(markdown: str):
-    for line in markdown.split("\n"):
+class RenderOptions(NamedTuple):
+    # 0 disables the block cache
+    block_cache_entries: int = 0
+    block_cache_path: Optional[str] = None
+    # least recently used blocks beyond this are pruned from the store
+    block_cache_store_entries: int = STORE_MAX_ENTRIES
+    profile: bool = False
+    # keep every stage as a trace event, not just the totals
+    profile_trace: bool = False
+    # original asset url -> fingerprinted url, see fingerprint.build_asset_map
+    asset_map: Optional[Dict[str, str]] = None
+    # emit markup straight from the Markdown scan instead of node trees
+    fast_render: bool = False
+
+
+# pages per task sent to a worker process
+JOB_CHUNKSIZE = 8
+
+_render_options: Optional[RenderOptions] = None
+_render_salt = ""
+_block_cache: Optional[BlockRenderCache] = None
+_output_writer: Optional[OutputWriter] = None
+
+
+def configure_render(options: RenderOptions):
+    # render state is per process: worker processes configure their own copy
+    global _render_options, _render_salt, _block_cache
+    enable_profiling(options.profile, options.profile_trace)
+    # cached blocks depend on the asset map and on the registered renderers
+    salt = asset_map_digest(options.asset_map) + renderer_registry_digest()
+    if options == _render_options and salt == _render_salt:
+        return
+    if _block_cache is not None:
+        _block_cache.close()
+    _render_options = options
+    _render_salt = salt
+    set_asset_map(options.asset_map)
+    load_template.cache_clear()
+    _block_cache = None
+    if options.block_cache_entries > 0:
+        _block_cache = BlockRenderCache(
+            options.block_cache_entries,
+            options.block_cache_path,
+            salt,
+            options.block_cache_store_entries,
+        )
+
+
+def take_render_stats() -> Dict[str, int]:
+    stats = {}
+    if _block_cache is not None:
+        _block_cache.flush()
+        stats.update(_block_cache.take_stats())
+    return stats
+
+
+def extract_title_from_lines(lines: Iterable[str]):
+    for line in lines:
         if line.startswith("# "):
-            return line[2:]
+            return line[2:].rstrip("\n")
     raise Exception("Invalid md format: 1 level 1 header is required")
 
 
-def get_file_content(path: str):
-    with open(path) as target:
-        return target.read()
+def extract_file_title(path: str):
+    # stops reading at the title, which is normally the first line
+    with stage("read"), open(path) as target:
+        return extract_title_from_lines(target)
+
 
+class PageGenerationError(Exception):
+    def __init__(self, src_path: str, message: str):
+        # both values go to Exception so the error survives pickling back from
+        # a worker process
+        super().__init__(src_path, message)
+        self.src_path = src_path
+        self.message = message
 
-def write_file(path: str, content: str = ""):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w") as file:
-        file.write(content)
+    def __str__(self):
+        return f"Failed to generate page from {self.src_path}: {self.message}"
 
 
-def generate_page(src_path: str, template_path: str, dest_path: str):
+def log_page(src_path: str, template_path: str, dest_path: str):
     print(f"Generating page from {src_path} to {dest_path} using {template_path}")
-    src_content = get_file_content(src_path)
-    template_content = get_file_content(template_path)
 
-    html_node = markdown_to_htmlnode(src_content)
-    html = html_node.to_html()
-    template_result = template_content.replace("{{ Content }}", html)
 
-    title = extract_title(src_content)
-    template_result = template_result.replace("{{ Title }}", title)
+def generate_page(src_path: str, template_path: str, dest_path: str) -> bool:
+    # renders and writes a single page right away, returns False when the
+    # output already held the same bytes
+    log_page(src_path, template_path, dest_path)
+    page = render_page(src_path, template_path)
+    try:
+        return write_if_changed(dest_path, page)
+    except OSError as error:
+        raise PageGenerationError(
+            src_path, f"{type(error).__name__}: {error}"
+        ) from error
+
+
+def render_page(src_path: str, template_path: str) -> bytes:
+    start = time.perf_counter()
+    try:
+        with stage("page"):
+            page = _render_page(src_path, template_path)
+    except PageGenerationError:
+        raise
+    except Exception as error:
+        raise PageGenerationError(
+            src_path, f"{type(error).__name__}: {error}"
+        ) from error
+    record_page(src_path, time.perf_counter() - start)
+    return page
+
+
+def _render_page(src_path: str, template_path: str) -> bytes:
+    template = load_template(template_path)
+    # the title is written before the content, so it is found first and the
+    # content is then parsed and written block by block
+    title = extract_file_title(src_path)
+    fast = _render_options is not None and _render_options.fast_render
+    html_node = MarkdownFileNode(src_path, _block_cache, fast)
+
+    # rendered in memory, the writer needs the whole page to tell whether the
+    # file on disk already holds it
+    buffer = StringIO()
+    template.write_to(buffer, {"Content": html_node, "Title": title})
+    return buffer.getvalue().encode()
 
-    write_file(dest_path, template_result)
 
+def get_output_writer() -> OutputWriter:
+    global _output_writer
+    if _output_writer is None:
+        _output_writer = OutputWriter()
+    return _output_writer
 
-def generate_page_recursive(src_dir: str, template_path: str, dest_dir: str):
-    src_dir_contents = os.listdir(src_dir)
-    for entry in src_dir_contents:
-        src_path = os.path.join(src_dir, entry)
-        dest_path = os.path.join(dest_dir, entry)
-        if os.path.isfile(src_path):
-            generate_page(
-                src_path, template_path, f"{os.path.splitext(dest_path)[0]}.html"
+
+def finish_writes() -> Counter:
+    # waits for the pages handed to the writer, counting written and skipped
+    if _output_writer is None:
+        return Counter(written=0, skipped=0)
+    try:
+        return _output_writer.flush()
+    except OutputWriteError as failure:
+        raise PageGenerationError(
+            failure.source, f"{type(failure.error).__name__}: {failure.error}"
+        ) from failure.error
+
+
+def page_dest_path(src_path: str, src_dir: str, dest_dir: str) -> str:
+    rel_path = os.path.relpath(src_path, src_dir)
+    return f"{os.path.splitext(os.path.join(dest_dir, rel_path))[0]}.html"
+
+
+def _init_worker(options: RenderOptions):
+    global _render_options, _block_cache, _output_writer
+    # a forked worker inherits the parent's cache, including its store
+    # connection, which must not be shared across processes; its writer
+    # threads do not survive the fork, and pages are written by the parent
+    _render_options = None
+    _block_cache = None
+    _output_writer = None
+    enable_profiling(False)
+    configure_render(options)
+
+
+def _render_page_job(
+    job: Tuple[str, str, str]
+) -> Tuple[bytes, Dict[str, int], Optional[Dict]]:
+    src_path, template_path, _ = job
+    page = render_page(src_path, template_path)
+    profiler = get_profiler()
+    return (
+        page,
+        take_render_stats(),
+        profiler.take() if profiler is not None else None,
+    )
+
+
+def generate_pages(
+    page_jobs: Iterable[Tuple[str, str]],
+    template_path: str,
+    processes: int = 1,
+    options: RenderOptions = RenderOptions(),
+) -> Counter:
+    # page_jobs may be a generator, pages render while it is still producing
+    stats = Counter()
+    writer = get_output_writer()
+    page_jobs = iter(page_jobs)
+    first_jobs = list(islice(page_jobs, 2))
+    page_jobs = chain(first_jobs, page_jobs)
+    try:
+        if processes <= 1 or len(first_jobs) <= 1:
+            configure_render(options)
+            for src_path, dest_path in page_jobs:
+                log_page(src_path, template_path, dest_path)
+                page = render_page(src_path, template_path)
+                # written on the writer's threads while the next page renders
+                writer.write(dest_path, page, src_path)
+            stats.update(take_render_stats())
+        else:
+            stats.update(
+                _generate_pages_parallel(page_jobs, template_path, processes, options)
             )
-            continue
-        generate_page_recursive(src_path, template_path, dest_path)
+    except BaseException:
+        # let the writes already handed over land before the error goes up
+        with suppress(PageGenerationError):
+            finish_writes()
+        raise
+    stats.update(finish_writes())
+    return stats
+
+
+def _generate_pages_parallel(
+    page_jobs: Iterable[Tuple[str, str]],
+    template_path: str,
+    processes: int,
+    options: RenderOptions,
+) -> Counter:
+    stats = Counter()
+    writer = get_output_writer()
+    submitted: Deque[Tuple[str, str, str]] = deque()
+
+    def jobs():
+        # remembered on the way in, results come back in the same order
+        for src_path, dest_path in page_jobs:
+            job = (src_path, template_path, dest_path)
+            submitted.append(job)
+            yield job
+
+    with ProcessPoolExecutor(
+        max_workers=processes, initializer=_init_worker, initargs=(options,)
+    ) as executor:
+        # chunks go to the workers as the walk finds pages, so the total is
+        # not known up front; map yields in submission order, so the log reads
+        # the same as a serial build no matter which worker finishes first
+        results = executor.map(_render_page_job, jobs(), chunksize=JOB_CHUNKSIZE)
+        for page, job_stats, profile_data in results:
+            job = submitted.popleft()
+            log_page(*job)
+            writer.write(job[2], page, job[0])
+            stats.update(job_stats)
+            if profile_data is not None:
+                get_profiler().merge(profile_data)
+    return stats
+
+
+def generate_page_recursive(
+    src_dir: str,
+    template_path: str,
+    dest_dir: str,
+    processes: int = 1,
+    options: RenderOptions = RenderOptions(),
+    shard_index: int = 0,
+    shard_count: int = 1,
+) -> Counter:
+    # with shard_count > 1 only the pages of shard shard_index are built, see
+    # shards.shard_of
+    page_jobs = select_shard(
+        iter_page_jobs(src_dir, dest_dir), src_dir, shard_index, shard_count
+    )
+    return generate_pages(page_jobs, template_path, processes, options)
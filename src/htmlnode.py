@@ -1,7 +1,11 @@
-from typing import Dict, List, Optional
+from io import StringIO
+from typing import Dict, List, Optional, TextIO
 
 
 class HtmlNode:
+    # pages create a lot of nodes, slots keep them free of a per-instance dict
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(
         self,
         tag: Optional[str] = None,
@@ -14,27 +18,30 @@ class HtmlNode:
         self.children = children
         self.props = props
 
-    def to_html(self):
+    def to_html(self) -> str:
+        buffer = StringIO()
+        self.write_to(buffer)
+        return buffer.getvalue()
+
+    def write_to(self, fp: TextIO):
         raise NotImplementedError()
 
     def props_to_html(self) -> str:
         if self.props is None:
             return ""
 
-        html_props = ""
-        for key, value in self.props.items():
-            if value is True:
-                html_props += f" {key}"
-            else:
-                html_props += f' {key}="{value}"'
-
-        return html_props
+        return "".join(
+            f" {key}" if value is True else f' {key}="{value}"'
+            for key, value in self.props.items()
+        )
 
     def __repr__(self):
         return f"HtmlNode({self.tag}, {self.value}, {self.children}, {self.props})"
 
 
 class ParentNode(HtmlNode):
+    __slots__ = ()
+
     def __init__(
         self,
         tag: Optional[str] = None,
@@ -43,15 +50,19 @@ class ParentNode(HtmlNode):
     ):
         super().__init__(tag, None, children, props)
 
-    def to_html(self):
+    def write_to(self, fp: TextIO):
         if self.children is None:
             raise ValueError("The children property is required for ParentNode")
 
         if self.tag is None:
             raise ValueError("The tag property is required for ParentNode")
 
-        content_string = "".join(map(lambda tag: tag.to_html(), self.children))
-        return f"<{self.tag}{self.props_to_html()}>{content_string}</{self.tag}>"
+        # children write straight into fp, so no subtree is ever materialized
+        # as its own string
+        fp.write(f"<{self.tag}{self.props_to_html()}>")
+        for child in self.children:
+            child.write_to(fp)
+        fp.write(f"</{self.tag}>")
 
     def __repr__(self):
         return f"ParentNode({self.tag}, {self.children}, {self.props})"
@@ -63,6 +74,8 @@ class ParentNode(HtmlNode):
 
 
 class LeafNode(HtmlNode):
+    __slots__ = ()
+
     def __init__(
         self,
         tag: Optional[str] = None,
@@ -71,7 +84,7 @@ class LeafNode(HtmlNode):
     ):
         super().__init__(tag, value, None, props)
 
-    def to_html(self):
+    def to_html(self) -> str:
         if self.value is None:
             raise ValueError("The value property is required for LeafNode")
 
@@ -80,5 +93,8 @@ class LeafNode(HtmlNode):
 
         return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
 
+    def write_to(self, fp: TextIO):
+        fp.write(self.to_html())
+
     def __repr__(self):
         return f"LeafNode({self.tag}, {self.value}, {self.props})"
@@ -1,7 +1,14 @@
-from typing import List
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
 import re
 
-from textnode import TextType, TextNode
+from profiling import stage
+from textnode import TextType, TextNode, text_to_html
+
+IMAGE_PATTERN = re.compile(r"!\[(.*?)\]\((.*?)\)")
+LINK_PATTERN = re.compile(r"\[(.*?)\]\((.*?)\)")
+INLINE_START_PATTERN = re.compile(r"!\[|[\[*`]")
+
+T = TypeVar("T")
 
 
 def split_nodes_delimiter(
@@ -28,7 +35,7 @@ def split_nodes_delimiter(
 
 
 def extract_markdown_images(text: str):
-    return re.findall(r"!\[(.*?)\]\((.*?)\)", text)
+    return IMAGE_PATTERN.findall(text)
 
 
 def split_nodes_image(old_nodes: List[TextNode]):
@@ -61,7 +68,7 @@ def split_nodes_image(old_nodes: List[TextNode]):
 
 
 def extract_markdown_links(text: str):
-    return re.findall(r"\[(.*?)\]\((.*?)\)", text)
+    return LINK_PATTERN.findall(text)
 
 
 def split_nodes_link(old_nodes: List[TextNode]):
@@ -94,10 +101,110 @@ def split_nodes_link(old_nodes: List[TextNode]):
 
 
 def text_to_textnodes(text: str) -> List[TextNode]:
-    nodes = [TextNode(text, TextType.TEXT)]
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "*", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    with stage("inline_parse"):
+        return _scan_inline(text, TextNode)
+
+
+def inline_markdown_to_html(text: str) -> str:
+    # same scan, but every section goes straight to its markup
+    with stage("inline_parse"):
+        return "".join(_scan_inline(text, text_to_html))
+
+
+class _TargetFinder:
+    # finds where an image or link opened at label_start closes, with the same
+    # result as matching IMAGE_PATTERN or LINK_PATTERN there: the label runs to
+    # the first "](" and the url to the first ")" after it, neither across a
+    # newline. The next "](", ")" and newline are remembered, so the many "["
+    # that open nothing, like footnote markers, do not rescan the rest of the
+    # text each
+    def __init__(self, text: str):
+        self.text = text
+        # needle -> (position searched from, position found or len(text))
+        self.found: Dict[str, Tuple[int, int]] = {}
+
+    def find(self, needle: str, start: int) -> int:
+        searched_from, position = self.found.get(needle, (1, 0))
+        if not searched_from <= start <= position:
+            position = self.text.find(needle, start)
+            if position == -1:
+                position = len(self.text)
+            self.found[needle] = (start, position)
+        return position
+
+    def match(self, label_start: int, end: int) -> Optional[Tuple[int, int]]:
+        # (position of "](", position of ")"), both before end, or None
+        close = self.find("](", label_start)
+        if close >= end:
+            return None
+        paren = self.find(")", close + 2)
+        # "](" holds no newline, so one lookup covers label and url
+        if paren >= end or self.find("\n", label_start) < paren:
+            return None
+        return close, paren
+
+
+def _scan_inline(
+    text: str, make_node: Callable[[str, TextType, Optional[str]], T]
+) -> List[T]:
+    # single left to right scan: plain text is only sliced out once the next
+    # image, link or delimited section is found, so the cost stays linear in the
+    # length of the text instead of one full pass per syntax element;
+    # make_node(text, text_type, url) builds each section
+    nodes: List[T] = []
+    targets = _TargetFinder(text)
+    text_start = 0
+    position = 0
+    while True:
+        start_match = INLINE_START_PATTERN.search(text, position)
+        if start_match is None:
+            break
+        start = start_match.start()
+        marker = start_match.group()
+
+        if marker == "![" or marker == "[":
+            label_start = start + len(marker)
+            match = targets.match(label_start, len(text))
+            if match is not None and marker == "[":
+                # images take precedence, a link may not swallow one
+                image_start = text.find("![", start, match[1])
+                while image_start != -1:
+                    image_match = targets.match(image_start + 2, match[1] + 1)
+                    if image_match is not None:
+                        match = targets.match(label_start, image_start)
+                        break
+                    image_start = text.find("![", image_start + 1, match[1])
+            if match is None:
+                # "![" without a target can still open a link at the "["
+                position = start + 1
+                continue
+            close, paren = match
+            if text_start < start:
+                nodes.append(make_node(text[text_start:start], TextType.TEXT, None))
+            text_type = TextType.IMAGE if marker == "![" else TextType.LINK
+            nodes.append(
+                make_node(text[label_start:close], text_type, text[close + 2 : paren])
+            )
+            position = text_start = paren + 1
+            continue
+
+        if marker == "*" and text.startswith("**", start):
+            delimiter, text_type = "**", TextType.BOLD
+        elif marker == "*":
+            delimiter, text_type = "*", TextType.ITALIC
+        else:
+            delimiter, text_type = "`", TextType.CODE
+
+        content_start = start + len(delimiter)
+        content_end = text.find(delimiter, content_start)
+        if content_end == -1:
+            raise ValueError("Invalid markdown, formatted section not closed")
+        if text_start < start:
+            nodes.append(make_node(text[text_start:start], TextType.TEXT, None))
+        if content_start < content_end:
+            nodes.append(make_node(text[content_start:content_end], text_type, None))
+        position = text_start = content_end + len(delimiter)
+
+    if text_start < len(text):
+        nodes.append(make_node(text[text_start:], TextType.TEXT, None))
     return nodes
@@ -1,22 +1,488 @@
+import argparse
 import os
-import shutil
+import time
+from typing import Dict, List, Optional, Set, Tuple
 
-from copy_static import copy_static_recursive
-from html_generation import generate_page_recursive
+from build_manifest import IncrementalPlan, load_manifest, page_record, save_manifest
+from compress_output import precompress_tree
+from copy_static import sync_static, sync_static_file
+from discovery import PAGE_SUFFIX, iter_page_jobs
+from etag_manifest import ETAG_MANIFEST_NAME, write_etag_manifest
+from fingerprint import (
+    ASSET_MANIFEST_NAME,
+    asset_dest_names,
+    asset_map_digest,
+    build_asset_map,
+    remove_asset_manifest,
+    write_asset_manifest,
+)
+from html_generation import (
+    RenderOptions,
+    configure_render,
+    generate_page,
+    generate_pages,
+    page_dest_path,
+)
+from output_writer import remove_empty_dirs, remove_untracked
+from profiling import enable_profiling, get_profiler, stage
+from render_cache import STORE_MAX_ENTRIES
+from shards import (
+    SHARD_MANIFEST_NAME,
+    ShardMergeError,
+    merge_shards,
+    parse_shard,
+    select_shard,
+    write_shard_manifest,
+)
+from template import load_template
+from watch import watch_paths
 
 static_dir_path = "./static"
 public_dir_path = "./public"
+content_dir_path = "./content"
+template_path = "template.html"
+manifest_path = "./.build_manifest.json"
 
 
-def main():
-    if os.path.exists(public_dir_path):
-        print("Deleting public directory...")
-        shutil.rmtree(public_dir_path)
+def sync_static_dir(
+    manifest: Dict,
+    static_hash: bool,
+    static_hardlink: bool,
+    asset_map: Optional[Dict[str, str]] = None,
+):
+    print("Syncing static files to public directory...")
+    with stage("copy_static"):
+        static_files, static_stats = sync_static(
+            static_dir_path,
+            public_dir_path,
+            manifest.get("static", []),
+            use_hash=static_hash,
+            hardlink=static_hardlink,
+            dest_names=asset_dest_names(asset_map) if asset_map else None,
+        )
+    print(
+        f"Static files: {static_stats['copied']} copied, "
+        f"{static_stats['unchanged']} unchanged, {static_stats['removed']} removed"
+    )
+    manifest["static"] = static_files
 
-    print("Copying static files to public directory...")
-    copy_static_recursive("./static", "./public")
 
-    generate_page_recursive("./content", "template.html", "./public")
+def build_pages(
+    manifest: Dict,
+    processes: int,
+    options: RenderOptions,
+    shard: Tuple[int, int] = (0, 1),
+    rebuild_all: bool = False,
+) -> Dict:
+    # the walk, the shard filter and the planner are all lazy, so the first
+    # stale page is rendering while the rest of the tree is still being read
+    page_jobs = select_shard(
+        iter_page_jobs(content_dir_path, public_dir_path), content_dir_path, *shard
+    )
+    plan = IncrementalPlan(
+        template_path, manifest, asset_map_digest(options.asset_map), rebuild_all
+    )
+    stale_count = 0
 
+    def stale_jobs():
+        nonlocal stale_count
+        for job in plan.stale_jobs(page_jobs):
+            stale_count += 1
+            yield job
 
-main()
+    stats = generate_pages(stale_jobs(), template_path, processes, options)
+    removed_outputs, new_manifest = plan.finish()
+
+    for dest_path in removed_outputs:
+        if os.path.exists(dest_path):
+            print(f"Removing stale page {dest_path}")
+            os.remove(dest_path)
+            remove_empty_dirs(os.path.dirname(dest_path), public_dir_path)
+
+    new_manifest["static"] = manifest.get("static", [])
+    new_manifest["precompressed"] = manifest.get("precompressed", [])
+    print(
+        f"Generated {stale_count} of {len(new_manifest['pages'])} pages: "
+        f"{stats['written']} written, {stats['skipped']} unchanged on disk"
+    )
+    if options.block_cache_entries > 0:
+        print(
+            f"Block cache: {stats['cache_hits']} hits, "
+            f"{stats['cache_misses']} misses"
+        )
+    return new_manifest
+
+
+def prune_public(
+    manifest: Dict,
+    asset_map: Optional[Dict[str, str]],
+    etags: bool,
+    sharded: bool,
+):
+    # a full build owns ./public like the rmtree it replaces: any file it did
+    # not write this time goes, pages and static files the manifest lost track
+    # of included, while outputs that came out the same keep their mtimes
+    dest_names = asset_dest_names(asset_map) if asset_map else {}
+    keep = {
+        os.path.relpath(record["dest"], public_dir_path)
+        for record in manifest["pages"].values()
+    }
+    keep.update(dest_names.get(rel_path, rel_path) for rel_path in manifest["static"])
+    # variants are kept for the precompress stage to refresh or remove
+    keep.update(
+        rel_path
+        for rel_path in manifest.get("precompressed", [])
+        if rel_path[:-3] in keep
+    )
+    if asset_map:
+        keep.add(ASSET_MANIFEST_NAME)
+    if etags:
+        keep.add(ETAG_MANIFEST_NAME)
+    if sharded:
+        keep.add(SHARD_MANIFEST_NAME)
+    for path in remove_untracked(public_dir_path, keep):
+        print(f"Removing untracked output {path}")
+
+
+def rebuild_changed(
+    changed: Set[str],
+    manifest: Dict,
+    processes: int,
+    options: RenderOptions,
+    static_hash: bool,
+    static_hardlink: bool,
+) -> Tuple[Dict, RenderOptions]:
+    # rebuilds only what the watcher reported, falling back to the incremental
+    # planner for anything that is not a single file
+    content_prefix = os.path.join(content_dir_path, "")
+    static_prefix = os.path.join(static_dir_path, "")
+    rescan_static = False
+    rescan_content = template_path in changed
+    if rescan_content:
+        load_template.cache_clear()
+
+    if options.asset_map is not None and any(
+        path.startswith(static_prefix) or path == static_dir_path for path in changed
+    ):
+        # fingerprinted names depend on the contents, every page that links
+        # to a changed asset has to be rendered again
+        asset_map = build_asset_map(static_dir_path)
+        if asset_map != options.asset_map:
+            options = options._replace(asset_map=asset_map)
+            configure_render(options)
+            write_asset_manifest(public_dir_path, asset_map)
+            rescan_static = rescan_content = True
+        changed = {path for path in changed if not path.startswith(static_prefix)}
+    static_files = set(manifest.get("static", []))
+
+    for path in sorted(changed):
+        if path.startswith(static_prefix):
+            rel_path = os.path.relpath(path, static_dir_path)
+            if not os.path.isfile(path) and rel_path not in static_files:
+                rescan_static = True
+                continue
+            result = sync_static_file(
+                static_dir_path, public_dir_path, rel_path, static_hash, static_hardlink
+            )
+            if result == "removed":
+                static_files.discard(rel_path)
+                print(f"Removed {os.path.join(public_dir_path, rel_path)}")
+            elif result == "copied":
+                static_files.add(rel_path)
+                print(f"Copied {path}")
+        elif path.startswith(content_prefix) and not rescan_content:
+            record = manifest["pages"].get(path)
+            if os.path.isfile(path):
+                # only Markdown sources become pages, as in a full build
+                if not path.endswith(PAGE_SUFFIX):
+                    continue
+                dest_path = page_dest_path(path, content_dir_path, public_dir_path)
+                generate_page(path, template_path, dest_path)
+                manifest["pages"][path] = page_record(path, dest_path)
+            elif record is not None:
+                del manifest["pages"][path]
+                if os.path.exists(record["dest"]):
+                    print(f"Removing stale page {record['dest']}")
+                    os.remove(record["dest"])
+                    remove_empty_dirs(
+                        os.path.dirname(record["dest"]), public_dir_path
+                    )
+            else:
+                rescan_content = True
+        elif path in (content_dir_path, static_dir_path):
+            rescan_content = rescan_content or path == content_dir_path
+            rescan_static = rescan_static or path == static_dir_path
+    manifest["static"] = sorted(static_files)
+
+    if rescan_static:
+        sync_static_dir(manifest, static_hash, static_hardlink, options.asset_map)
+    if rescan_content:
+        manifest = build_pages(manifest, processes, options)
+    return manifest, options
+
+
+def watch_site(
+    manifest: Dict,
+    processes: int,
+    options: RenderOptions,
+    static_hash: bool,
+    static_hardlink: bool,
+):
+    configure_render(options)
+    paths = [content_dir_path, static_dir_path, template_path]
+    print(f"Watching {', '.join(paths)} for changes, press Ctrl+C to stop")
+
+    def on_change(changed: Set[str]):
+        nonlocal manifest, options
+        start = time.perf_counter()
+        try:
+            manifest, options = rebuild_changed(
+                changed, manifest, processes, options, static_hash, static_hardlink
+            )
+        except Exception as error:
+            # keep watching, the next save will most likely fix it
+            print(f"Rebuild failed: {error}")
+            return
+        print(f"Rebuilt in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    try:
+        watch_paths(paths, on_change)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        save_manifest(manifest_path, manifest)
+
+
+def merge(shard_dirs: List[str], etags: bool):
+    try:
+        stats = merge_shards(shard_dirs, public_dir_path)
+    except ShardMergeError as error:
+        raise SystemExit(f"Merge failed: {error}")
+    print(f"Merged {stats['files']} files from {stats['shards']} shards")
+    # the ETag manifest covers the whole tree, so it is written after merging
+    if etags:
+        etag_count = write_etag_manifest(public_dir_path)
+        print(f"Wrote {etag_count} ETags to {ETAG_MANIFEST_NAME}")
+
+
+def main(
+    incremental: bool = False,
+    processes: int = 1,
+    options: RenderOptions = RenderOptions(),
+    profile_top: int = 10,
+    profile_trace_path: Optional[str] = None,
+    static_hash: bool = False,
+    static_hardlink: bool = False,
+    fingerprint: bool = False,
+    watch: bool = False,
+    precompress_min_size: Optional[int] = None,
+    etags: bool = False,
+    shard: Tuple[int, int] = (0, 1),
+):
+    # a shard builds its share of the pages, and shard 0 the static files too
+    shard_index, shard_count = shard
+    enable_profiling(options.profile, options.profile_trace)
+    # a full build renders every page again but keeps ./public, so outputs
+    # that come out the same keep their mtimes; prune_public then removes
+    # every file it did not write. An incremental build only removes the
+    # outputs the manifest records as stale
+    manifest = load_manifest(manifest_path)
+
+    if fingerprint:
+        options = options._replace(asset_map=build_asset_map(static_dir_path))
+    if shard_index == 0:
+        sync_static_dir(manifest, static_hash, static_hardlink, options.asset_map)
+    if fingerprint and shard_index == 0:
+        write_asset_manifest(public_dir_path, options.asset_map)
+        print(f"Wrote {len(options.asset_map)} fingerprinted assets to asset manifest")
+    elif shard_index == 0:
+        remove_asset_manifest(public_dir_path)
+    manifest = build_pages(
+        manifest, processes, options, shard, rebuild_all=not incremental
+    )
+    save_manifest(manifest_path, manifest)
+    if not incremental and os.path.isdir(public_dir_path):
+        prune_public(manifest, options.asset_map, etags, shard_count > 1)
+
+    if precompress_min_size is not None:
+        with stage("precompress"):
+            manifest["precompressed"], compress_stats = precompress_tree(
+                public_dir_path,
+                precompress_min_size,
+                previous_variants=manifest.get("precompressed", []),
+            )
+        save_manifest(manifest_path, manifest)
+        print(
+            f"Precompressed: {compress_stats['compressed']} written, "
+            f"{compress_stats['unchanged']} up to date, "
+            f"{compress_stats['removed']} removed"
+        )
+
+    if etags:
+        with stage("etags"):
+            etag_count = write_etag_manifest(public_dir_path)
+        print(f"Wrote {etag_count} ETags to {ETAG_MANIFEST_NAME}")
+
+    if shard_count > 1:
+        file_count = write_shard_manifest(public_dir_path, shard_index, shard_count)
+        print(
+            f"Shard {shard_index}/{shard_count}: {file_count} files "
+            f"in {public_dir_path}"
+        )
+
+    profiler = get_profiler()
+    if profiler is not None:
+        print(profiler.report(profile_top))
+        if options.profile_trace:
+            profiler.write_trace(profile_trace_path)
+            print(f"Wrote trace events to {profile_trace_path}")
+
+    if watch:
+        watch_site(manifest, processes, options, static_hash, static_hardlink)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Static site generator")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only rebuild pages whose sources or template changed, and leave "
+        "files the build did not write in ./public",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes used to render pages, 0 uses every core",
+    )
+    parser.add_argument(
+        "--block-cache",
+        type=int,
+        default=4096,
+        help="Rendered blocks kept in memory per process, 0 disables the cache",
+    )
+    parser.add_argument(
+        "--block-cache-store",
+        type=str,
+        default=None,
+        help="SQLite file that keeps rendered blocks between builds",
+    )
+    parser.add_argument(
+        "--block-cache-store-entries",
+        type=int,
+        default=STORE_MAX_ENTRIES,
+        help="Blocks kept in the store, the least recently used are pruned",
+    )
+    parser.add_argument(
+        "--fast-render",
+        action="store_true",
+        help="Write page markup straight from the Markdown scan, skipping node trees",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Report wall time and calls per pipeline stage and the slowest pages",
+    )
+    parser.add_argument(
+        "--profile-top", type=int, default=10, help="Number of slowest pages shown"
+    )
+    parser.add_argument(
+        "--profile-trace",
+        type=str,
+        default=None,
+        help="Also write a Chrome trace-event JSON file to this path",
+    )
+    parser.add_argument(
+        "--static-hash",
+        action="store_true",
+        help="Compare static files by content hash when only their mtime differs",
+    )
+    parser.add_argument(
+        "--static-hardlink",
+        action="store_true",
+        help="Hardlink static files into ./public instead of copying them",
+    )
+    parser.add_argument(
+        "--fingerprint",
+        action="store_true",
+        help="Add content hashes to static file names and rewrite references",
+    )
+    parser.add_argument(
+        "--precompress",
+        action="store_true",
+        help="Write .gz siblings of text outputs for the server to send as-is",
+    )
+    parser.add_argument(
+        "--precompress-min-size",
+        type=int,
+        default=1024,
+        help="Smallest output in bytes that gets a .gz sibling",
+    )
+    parser.add_argument(
+        "--etags",
+        action="store_true",
+        help=f"Write content hash ETags for every output to {ETAG_MANIFEST_NAME}",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and rebuild changed pages and static files on save",
+    )
+    parser.add_argument(
+        "--shard",
+        type=str,
+        default=None,
+        help="Build only shard K/N of the pages, K from 0, shard 0 also syncs static",
+    )
+    parser.add_argument(
+        "--shard-dir",
+        type=str,
+        default=None,
+        help="Output directory of a --shard build, ./shards/K-of-N by default",
+    )
+    parser.add_argument(
+        "--merge-shards",
+        nargs="+",
+        metavar="SHARD_DIR",
+        default=None,
+        help="Combine the outputs of every shard into ./public instead of building",
+    )
+    args = parser.parse_args()
+
+    if args.merge_shards is not None:
+        merge(args.merge_shards, args.etags)
+        raise SystemExit()
+
+    shard = (0, 1)
+    if args.shard is not None:
+        try:
+            shard = parse_shard(args.shard)
+        except ValueError as error:
+            parser.error(str(error))
+        if args.watch or args.etags:
+            parser.error("--watch and --etags apply to the merged tree, not a shard")
+        # each shard is a tree of its own, with its own manifest for --incremental
+        public_dir_path = args.shard_dir or f"./shards/{shard[0]}-of-{shard[1]}"
+        manifest_path = f"./.build_manifest.shard-{shard[0]}-of-{shard[1]}.json"
+
+    main(
+        incremental=args.incremental,
+        processes=args.jobs or os.cpu_count() or 1,
+        options=RenderOptions(
+            block_cache_entries=args.block_cache,
+            block_cache_path=args.block_cache_store,
+            block_cache_store_entries=args.block_cache_store_entries,
+            profile=args.profile or args.profile_trace is not None,
+            profile_trace=args.profile_trace is not None,
+            fast_render=args.fast_render,
+        ),
+        profile_top=args.profile_top,
+        profile_trace_path=args.profile_trace,
+        static_hash=args.static_hash,
+        static_hardlink=args.static_hardlink,
+        fingerprint=args.fingerprint,
+        watch=args.watch,
+        precompress_min_size=args.precompress_min_size if args.precompress else None,
+        etags=args.etags,
+        shard=shard,
+    )
@@ -0,0 +1,132 @@
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+import os
+import threading
+from typing import List, Optional, Set, Tuple
+
+WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_CLOEXEC", 0)
+
+
+def is_unchanged(path: str, data: bytes) -> bool:
+    # the size rules out almost every changed page without reading it
+    try:
+        if os.stat(path).st_size != len(data):
+            return False
+        with open(path, "rb") as target:
+            return target.read() == data
+    except OSError:
+        return False
+
+
+def write_atomic(path: str, data: bytes):
+    # readers, like the dev server or a sync job, see the old file or the new
+    # one but never a partial write; the temp name is unique per thread and
+    # ends in .tmp, which the watcher ignores
+    dir_path, name = os.path.split(path)
+    tmp_path = os.path.join(
+        dir_path, f".{name}.{os.getpid()}.{threading.get_ident()}.tmp"
+    )
+    try:
+        fd = os.open(tmp_path, WRITE_FLAGS, 0o666)
+    except FileNotFoundError:
+        # only the first page of a directory pays for creating it
+        os.makedirs(dir_path or ".", exist_ok=True)
+        fd = os.open(tmp_path, WRITE_FLAGS, 0o666)
+    try:
+        with os.fdopen(fd, "wb") as target:
+            target.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def write_if_changed(path: str, data: bytes) -> bool:
+    # True when the file was written, False when it already held these bytes,
+    # in which case its mtime is left alone for rsync and CDN sync
+    if is_unchanged(path, data):
+        return False
+    write_atomic(path, data)
+    return True
+
+
+def remove_empty_dirs(path: str, root: str):
+    # removes path and its parents up to, but not including, root for as long
+    # as they are empty
+    root = os.path.abspath(root)
+    path = os.path.abspath(path)
+    while path != root and path.startswith(root):
+        try:
+            os.rmdir(path)
+        except OSError:
+            return
+        path = os.path.dirname(path)
+
+
+def remove_untracked(root: str, keep: Set[str]) -> List[str]:
+    # removes every file under root whose path relative to root is not in
+    # keep, then the directories left empty; returns the removed files
+    removed = []
+    for dir_path, _, file_names in os.walk(root, topdown=False):
+        for file_name in file_names:
+            path = os.path.join(dir_path, file_name)
+            if os.path.relpath(path, root) not in keep:
+                os.remove(path)
+                removed.append(path)
+        if dir_path != root and not os.listdir(dir_path):
+            os.rmdir(dir_path)
+    return removed
+
+
+class OutputWriter:
+    def __init__(self, max_workers: int = 4, max_pending: int = 64):
+        # pending writes are bounded, so a fast renderer cannot queue up every
+        # page of the site in memory
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="output-writer"
+        )
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.pending: List[Tuple[str, Future]] = []
+
+    def write(self, path: str, data: bytes, source: Optional[str] = None):
+        # source names the input in errors, it defaults to the output path
+        self.slots.acquire()
+        try:
+            future = self.executor.submit(write_if_changed, path, data)
+        except BaseException:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda _: self.slots.release())
+        self.pending.append((source or path, future))
+
+    def flush(self) -> Counter:
+        # waits for every pending write and counts them; raises the error of
+        # the first failed write as (source, error) in an OutputWriteError
+        stats = Counter(written=0, skipped=0)
+        pending, self.pending = self.pending, []
+        failure = None
+        for source, future in pending:
+            try:
+                stats["written" if future.result() else "skipped"] += 1
+            except Exception as error:
+                if failure is None:
+                    failure = OutputWriteError(source, error)
+        if failure is not None:
+            raise failure
+        return stats
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self.executor.shutdown()
+
+
+class OutputWriteError(Exception):
+    def __init__(self, source: str, error: Exception):
+        super().__init__(source, error)
+        self.source = source
+        self.error = error
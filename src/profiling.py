@@ -0,0 +1,135 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+class Profiler:
+    def __init__(self, trace: bool = False):
+        self.trace = trace
+        # stage name -> [inclusive seconds, self seconds, calls]
+        self.stages: Dict[str, List[float]] = {}
+        self.pages: Dict[str, float] = {}
+        self.events: List[Dict] = []
+        self.stack: List["ProfiledStage"] = []
+
+    def record(self, name: str, start: float, duration: float, child_time: float):
+        totals = self.stages.setdefault(name, [0.0, 0.0, 0])
+        totals[0] += duration
+        totals[1] += duration - child_time
+        totals[2] += 1
+        if not self.trace:
+            return
+        self.events.append(
+            {
+                "name": name,
+                "cat": "stage",
+                "ph": "X",
+                "ts": start * 1e6,
+                "dur": duration * 1e6,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+            }
+        )
+
+    def take(self) -> Dict:
+        # plain data, so worker processes can send it back to the parent
+        data = {"stages": self.stages, "pages": self.pages, "events": self.events}
+        self.stages = {}
+        self.pages = {}
+        self.events = []
+        return data
+
+    def merge(self, data: Dict):
+        for name, (inclusive, own, calls) in data["stages"].items():
+            totals = self.stages.setdefault(name, [0.0, 0.0, 0])
+            totals[0] += inclusive
+            totals[1] += own
+            totals[2] += calls
+        self.pages.update(data["pages"])
+        self.events += data["events"]
+
+    def report(self, top: int = 10) -> str:
+        lines = [
+            f"{'stage':<16}{'calls':>10}{'total s':>12}{'self s':>12}",
+        ]
+        ordered_stages = sorted(self.stages.items(), key=lambda item: -item[1][1])
+        for name, (inclusive, own, calls) in ordered_stages:
+            lines.append(f"{name:<16}{calls:>10}{inclusive:>12.4f}{own:>12.4f}")
+
+        slowest_pages = sorted(self.pages.items(), key=lambda item: -item[1])[:top]
+        if slowest_pages:
+            lines.append("")
+            lines.append(f"Slowest {len(slowest_pages)} pages:")
+            for path, seconds in slowest_pages:
+                lines.append(f"{seconds:>10.4f}s  {path}")
+        return "\n".join(lines)
+
+    def write_trace(self, path: str):
+        # Chrome trace-event format, loadable in chrome://tracing or Perfetto
+        with open(path, "w") as target:
+            json.dump({"traceEvents": self.events}, target)
+
+
+class ProfiledStage:
+    __slots__ = ("profiler", "name", "start", "child_time")
+
+    def __init__(self, profiler: Profiler, name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.child_time = 0.0
+        self.profiler.stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        duration = time.perf_counter() - self.start
+        stack = self.profiler.stack
+        stack.pop()
+        if stack:
+            stack[-1].child_time += duration
+        self.profiler.record(self.name, self.start, duration, self.child_time)
+        return False
+
+
+class NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_STAGE = NullStage()
+_profiler: Optional[Profiler] = None
+
+
+def enable_profiling(enabled: bool = True, trace: bool = False):
+    global _profiler
+    if not enabled:
+        _profiler = None
+    elif _profiler is None:
+        _profiler = Profiler(trace)
+    else:
+        _profiler.trace = trace
+
+
+def get_profiler() -> Optional[Profiler]:
+    return _profiler
+
+
+def stage(name: str):
+    # disabled profiling only costs this check and a shared no-op context
+    if _profiler is None:
+        return NULL_STAGE
+    return ProfiledStage(_profiler, name)
+
+
+def record_page(path: str, seconds: float):
+    if _profiler is not None:
+        _profiler.pages[path] = seconds
@@ -0,0 +1,142 @@
+from collections import OrderedDict
+import hashlib
+import sqlite3
+import time
+from typing import Dict, Optional, Set
+
+# bump whenever block rendering changes its output, so stale entries in an
+# on-disk store are never served
+PARSER_VERSION = 1
+# blocks kept in an on-disk store, the least recently used go first
+STORE_MAX_ENTRIES = 100_000
+
+
+class BlockRenderCache:
+    def __init__(
+        self,
+        max_entries: int = 4096,
+        store_path: Optional[str] = None,
+        salt: str = "",
+        store_max_entries: int = STORE_MAX_ENTRIES,
+    ):
+        # salt covers render inputs besides the block text, like the asset map
+        self.salt = salt
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.store: Optional[sqlite3.Connection] = None
+        self.store_max_entries = store_max_entries
+        # every block used in this run is stamped with its start time, which is
+        # what pruning orders by
+        self.used = int(time.time())
+        self.touched: Set[str] = set()
+        # new blocks wait here for flush, which writes them in one short
+        # transaction, so workers sharing the store never hold its write lock
+        # for a whole page render
+        self.pending: Dict[str, str] = {}
+        self.added = 0
+        if store_path is not None:
+            self.store = sqlite3.connect(store_path, timeout=30)
+            self.store.execute("PRAGMA journal_mode=WAL")
+            self.store.execute(
+                "CREATE TABLE IF NOT EXISTS blocks (key TEXT PRIMARY KEY, html TEXT, "
+                "used INTEGER NOT NULL DEFAULT 0)"
+            )
+            columns = [
+                row[1] for row in self.store.execute("PRAGMA table_info(blocks)")
+            ]
+            if "used" not in columns:
+                # a store written before entries were stamped
+                self.store.execute(
+                    "ALTER TABLE blocks ADD COLUMN used INTEGER NOT NULL DEFAULT 0"
+                )
+            self.store.execute(
+                "CREATE INDEX IF NOT EXISTS blocks_used ON blocks (used)"
+            )
+            self.store.commit()
+
+    def key(self, block: str) -> str:
+        key_source = f"{PARSER_VERSION}\0{self.salt}\0{block}"
+        return hashlib.sha1(key_source.encode()).hexdigest()
+
+    def get(self, block: str) -> Optional[str]:
+        key = self.key(block)
+        html = self.entries.get(key)
+        if html is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return html
+
+        if self.store is not None:
+            html = self.pending.get(key)
+            if html is not None:
+                self.hits += 1
+                return html
+            row = self.store.execute(
+                "SELECT html FROM blocks WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                self._remember(key, row[0])
+                self.touched.add(key)
+                self.hits += 1
+                return row[0]
+
+        self.misses += 1
+        return None
+
+    def put(self, block: str, html: str):
+        key = self.key(block)
+        self._remember(key, html)
+        if self.store is not None:
+            self.pending[key] = html
+
+    def _remember(self, key: str, html: str):
+        self.entries[key] = html
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def flush(self, prune: bool = False):
+        if self.store is None:
+            return
+        self.store.executemany(
+            "INSERT OR REPLACE INTO blocks (key, html, used) VALUES (?, ?, ?)",
+            [(key, html, self.used) for key, html in self.pending.items()],
+        )
+        self.added += len(self.pending)
+        self.pending.clear()
+        # hits are stamped in batches instead of a write per lookup
+        self.store.executemany(
+            "UPDATE blocks SET used = ? WHERE key = ? AND used < ?",
+            [(self.used, key, self.used) for key in self.touched],
+        )
+        self.touched.clear()
+        # pruning sorts the store, so it waits for a tenth of the cap in new rows
+        if self.added > self.store_max_entries // 10 or (prune and self.added):
+            self.prune()
+        self.store.commit()
+
+    def prune(self) -> int:
+        # drops the least recently used blocks beyond store_max_entries and
+        # returns how many went
+        self.added = 0
+        cursor = self.store.execute(
+            "DELETE FROM blocks WHERE key IN "
+            "(SELECT key FROM blocks ORDER BY used DESC LIMIT -1 OFFSET ?)",
+            (self.store_max_entries,),
+        )
+        return cursor.rowcount
+
+    def take_stats(self) -> Dict[str, int]:
+        # counters since the last call, so worker processes can report deltas
+        stats = {"cache_hits": self.hits, "cache_misses": self.misses}
+        self.hits = 0
+        self.misses = 0
+        return stats
+
+    def close(self):
+        if self.store is not None:
+            self.flush(prune=True)
+            self.store.close()
+            self.store = None
@@ -0,0 +1,156 @@
+from collections import Counter
+import hashlib
+import json
+import os
+import shutil
+from typing import Dict, Iterable, List, Tuple
+
+from build_manifest import hash_file
+
+SHARD_MANIFEST_NAME = ".shard-manifest.json"
+SHARD_MANIFEST_VERSION = 1
+
+
+class ShardMergeError(Exception):
+    pass
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    # "k/n", with k counted from 0
+    index, _, count = value.partition("/")
+    try:
+        shard_index, shard_count = int(index), int(count)
+    except ValueError:
+        raise ValueError(f"Invalid shard {value!r}, expected k/n") from None
+    if shard_count < 1 or not 0 <= shard_index < shard_count:
+        raise ValueError(f"Invalid shard {value!r}, k must be in 0..n-1")
+    return shard_index, shard_count
+
+
+def shard_of(rel_path: str, shard_count: int) -> int:
+    # a page's shard only depends on its own path, so adding pages never moves
+    # the other ones and every machine agrees without talking to the others
+    digest = hashlib.sha1(rel_path.replace(os.sep, "/").encode()).digest()
+    return int.from_bytes(digest[:8], "big") % shard_count
+
+
+def select_shard(
+    page_jobs: Iterable[Tuple[str, str]],
+    src_dir: str,
+    shard_index: int,
+    shard_count: int,
+) -> Iterable[Tuple[str, str]]:
+    # lazy, so a streamed walk stays streamed
+    if shard_count == 1:
+        return page_jobs
+    return (
+        (src_path, dest_path)
+        for src_path, dest_path in page_jobs
+        if shard_of(os.path.relpath(src_path, src_dir), shard_count) == shard_index
+    )
+
+
+def write_shard_manifest(shard_dir: str, shard_index: int, shard_count: int) -> int:
+    # every output of the shard with its content hash, which is what the
+    # merge checks for conflicts and incomplete copies
+    files = {}
+    for dir_path, _, file_names in os.walk(shard_dir):
+        for file_name in file_names:
+            path = os.path.join(dir_path, file_name)
+            rel_path = os.path.relpath(path, shard_dir).replace(os.sep, "/")
+            # a compressed copy left by --precompress included
+            if not rel_path.startswith(SHARD_MANIFEST_NAME):
+                files[rel_path] = hash_file(path)
+
+    os.makedirs(shard_dir, exist_ok=True)
+    path = os.path.join(shard_dir, SHARD_MANIFEST_NAME)
+    with open(path, "w") as target:
+        json.dump(
+            {
+                "version": SHARD_MANIFEST_VERSION,
+                "shard": shard_index,
+                "shards": shard_count,
+                "files": files,
+            },
+            target,
+            indent=2,
+            sort_keys=True,
+        )
+    return len(files)
+
+
+def load_shard_manifest(shard_dir: str) -> Dict:
+    path = os.path.join(shard_dir, SHARD_MANIFEST_NAME)
+    try:
+        with open(path) as target:
+            manifest = json.load(target)
+    except (OSError, ValueError) as error:
+        raise ShardMergeError(f"Cannot read shard manifest {path}: {error}")
+    if manifest.get("version") != SHARD_MANIFEST_VERSION:
+        raise ShardMergeError(f"Unsupported shard manifest version in {path}")
+    return manifest
+
+
+def plan_merge(shard_dirs: List[str]) -> Dict[str, Tuple[str, str]]:
+    # returns output path -> (shard directory, content hash), or raises when
+    # shards are missing, repeated or disagree about a file
+    manifests = [
+        (shard_dir, load_shard_manifest(shard_dir)) for shard_dir in shard_dirs
+    ]
+    shard_counts = {manifest["shards"] for _, manifest in manifests}
+    if len(shard_counts) != 1:
+        raise ShardMergeError(
+            f"Shards come from builds split {len(shard_counts)} different ways"
+        )
+    shard_count = shard_counts.pop()
+    indexes = sorted(manifest["shard"] for _, manifest in manifests)
+    if indexes != list(range(shard_count)):
+        raise ShardMergeError(
+            f"Expected shards 0..{shard_count - 1} exactly once, got {indexes}"
+        )
+
+    merged: Dict[str, Tuple[str, str]] = {}
+    conflicts = []
+    for shard_dir, manifest in sorted(manifests, key=lambda item: item[1]["shard"]):
+        for rel_path, digest in manifest["files"].items():
+            previous = merged.get(rel_path)
+            if previous is None:
+                merged[rel_path] = (shard_dir, digest)
+            elif previous[1] != digest:
+                conflicts.append(f"{rel_path} ({previous[0]}, {shard_dir})")
+    if conflicts:
+        raise ShardMergeError(
+            f"{len(conflicts)} outputs differ between shards: "
+            + ", ".join(sorted(conflicts))
+        )
+    return merged
+
+
+def merge_shards(shard_dirs: List[str], dest_dir: str) -> Counter:
+    merged = plan_merge(shard_dirs)
+    stats = Counter(shards=len(shard_dirs))
+
+    # assembled next to the target and swapped in, so a failed merge leaves
+    # the previous tree alone
+    tmp_dir = f"{dest_dir.rstrip(os.sep)}.merging"
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    os.makedirs(tmp_dir)
+    try:
+        for rel_path, (shard_dir, digest) in sorted(merged.items()):
+            src_path = os.path.join(shard_dir, rel_path)
+            dest_path = os.path.join(tmp_dir, rel_path)
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            # copy2 keeps mtimes, which precompressed variants are matched by
+            shutil.copy2(src_path, dest_path)
+            if hash_file(dest_path) != digest:
+                raise ShardMergeError(f"{src_path} does not match its shard manifest")
+            stats["files"] += 1
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    if os.path.exists(dest_dir):
+        shutil.rmtree(dest_dir)
+    os.replace(tmp_dir, dest_dir)
+    return stats
@@ -0,0 +1,23 @@
+import os
+import tempfile
+import unittest
+from typing import Union
+
+
+class TempTreeTestCase(unittest.TestCase):
+    # each test gets a fresh directory as self.root, removed when it finishes
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.root = tmp_dir.name
+
+    def write(self, rel_path: str, content: Union[str, bytes] = ""):
+        path = os.path.join(self.root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if isinstance(content, bytes):
+            with open(path, "wb") as file:
+                file.write(content)
+        else:
+            with open(path, "w") as file:
+                file.write(content)
+        return path
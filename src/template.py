@@ -0,0 +1,56 @@
+from functools import lru_cache
+import re
+from typing import Dict, List, TextIO, Union
+
+from fingerprint import rewrite_references
+from htmlnode import HtmlNode
+from profiling import stage
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{ *(\w+) *\}\}")
+
+
+class Template:
+    def __init__(self, source: str):
+        # static text around the placeholders, always one more than the slots
+        self.segments: List[str] = []
+        self.slots: List[str] = []
+        self.placeholders: List[str] = []
+
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(source):
+            self.segments.append(source[position : match.start()])
+            self.slots.append(match.group(1))
+            self.placeholders.append(match.group(0))
+            position = match.end()
+        self.segments.append(source[position:])
+
+    def render(self, values: Dict[str, str]) -> str:
+        parts = [self.segments[0]]
+        for i, slot in enumerate(self.slots):
+            # unknown placeholders are kept as they are written in the template
+            parts.append(values.get(slot, self.placeholders[i]))
+            parts.append(self.segments[i + 1])
+        return "".join(parts)
+
+    def write_to(self, fp: TextIO, values: Dict[str, Union[str, HtmlNode]]):
+        # like render, but html node values are streamed into fp instead of
+        # being serialized to a string first
+        with stage("template"):
+            fp.write(self.segments[0])
+            for i, slot in enumerate(self.slots):
+                value = values.get(slot, self.placeholders[i])
+                if isinstance(value, HtmlNode):
+                    with stage("serialize"):
+                        value.write_to(fp)
+                else:
+                    fp.write(value)
+                fp.write(self.segments[i + 1])
+
+    def __repr__(self):
+        return f"Template({self.slots})"
+
+
+@lru_cache(maxsize=None)
+def load_template(path: str) -> Template:
+    with open(path) as target:
+        return Template(rewrite_references(target.read()))
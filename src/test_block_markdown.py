@@ -1,11 +1,35 @@
+from enum import Enum
+import os
+import random
 import unittest
 
 from block_markdown import (
+    BLOCK_CLASSIFIERS,
+    BLOCK_RENDERERS,
+    MarkdownFileNode,
+    classify_block,
+    iter_markdown_file_blocks,
+    markdown_to_html,
     markdown_to_htmlnode,
     markdown_to_blocks,
     get_block_type,
+    register_block_renderer,
+    renderer_registry_digest,
+    text_to_html_nodes,
     BlockType,
 )
+from htmlnode import ParentNode
+from temp_tree import TempTreeTestCase
+
+
+class ExtraBlockType(Enum):
+    ASIDE = "aside"
+
+
+def classify_aside(block):
+    if block.startswith("!!! "):
+        return ExtraBlockType.ASIDE, [block[4:]]
+    return None
 
 
 class TestBlockMarkdown(unittest.TestCase):
@@ -86,6 +110,25 @@ text
         block = "paragraph"
         self.assertEqual(get_block_type(block), BlockType.PARAGRAPH)
 
+    def test_classify_block_strips_markers(self):
+        self.assertEqual(
+            (BlockType.ORDERED_LIST, ["one", "two"]), classify_block("1. one\n2. two")
+        )
+        self.assertEqual(
+            (BlockType.UNORDERED_LIST, ["one", "two"]), classify_block("* one\n- two")
+        )
+        self.assertEqual((BlockType.QUOTE, ["a", "b"]), classify_block("> a\n> b"))
+        self.assertEqual(
+            (BlockType.CODE, ["line", "", "more"]),
+            classify_block("```\nline\n\nmore\n```"),
+        )
+        self.assertEqual(
+            (BlockType.PARAGRAPH, ["* one", "two"]), classify_block("* one\ntwo")
+        )
+        self.assertEqual(
+            (BlockType.PARAGRAPH, ["1. one", "- two"]), classify_block("1. one\n- two")
+        )
+
     def test_markdown_paragraphs(self):
         md = """
 This is **bolded** paragraph
@@ -155,6 +198,124 @@ this is paragraph text
             "<div><blockquote><p>This is a blockquote block</p></blockquote><p>this is paragraph text</p></div>",
         )
 
+    def test_markdown_to_blocks_keeps_fence_with_many_blank_lines(self):
+        md = "intro\n\n```\nfirst\n\n\n  \nsecond\n\nthird\n```\n\noutro"
+        self.assertEqual(
+            ["intro", "```\nfirst\nsecond\nthird\n```", "outro"],
+            markdown_to_blocks(md),
+        )
+
+    def test_registered_block_renderer(self):
+        digest = renderer_registry_digest()
+        classified = []
+
+        def classify(block):
+            classified.append(block)
+            return classify_aside(block)
+
+        register_block_renderer(
+            ExtraBlockType.ASIDE,
+            lambda text_block, lines: ParentNode(
+                "aside", text_to_html_nodes(lines[0])
+            ),
+            classify,
+            first_chars="!",
+        )
+        self.addCleanup(BLOCK_RENDERERS.pop, ExtraBlockType.ASIDE)
+        self.addCleanup(BLOCK_CLASSIFIERS.pop, "!")
+
+        node = markdown_to_htmlnode("!!! Mind the **gap**\n\nplain\n\n!plain")
+        self.assertEqual(
+            "<div><aside>Mind the <b>gap</b></aside><p>plain</p><p>!plain</p></div>",
+            node.to_html(),
+        )
+        # only blocks starting with the registered character are offered
+        self.assertEqual(["!!! Mind the **gap**", "!plain"], classified)
+        # the block cache salt follows the registered renderers
+        self.assertNotEqual(digest, renderer_registry_digest())
+
+    def test_classifier_needs_first_chars(self):
+        with self.assertRaises(ValueError):
+            register_block_renderer(
+                ExtraBlockType.ASIDE, lambda text_block, lines: None, classify_aside
+            )
+        self.assertNotIn(ExtraBlockType.ASIDE, BLOCK_RENDERERS)
+
+    def test_fast_render_matches_node_render(self):
+        rng = random.Random(19)
+        inline_pieces = [
+            "word",
+            " ",
+            "**bold**",
+            "*italic*",
+            "`code`",
+            "[link](https://example.com/a?b=c)",
+            "![alt](/images/x.png)",
+            "[](empty)",
+            "![broken",
+            "*",
+            "**",
+            "#",
+            "> ",
+            "<tag>",
+        ]
+
+        def inline():
+            return "".join(rng.choice(inline_pieces) for _ in range(rng.randint(0, 8)))
+
+        line_prefixes = ["", "", "# ", "### ", "####### ", "> ", "* ", "- ", "1. "]
+        for _ in range(500):
+            blocks = []
+            for _ in range(rng.randint(0, 6)):
+                if rng.random() < 0.15:
+                    blocks.append(f"```\n{inline()}\n\n{inline()}\n```")
+                    continue
+                prefix = rng.choice(line_prefixes)
+                lines = [
+                    (prefix if rng.random() < 0.9 else rng.choice(line_prefixes))
+                    + inline()
+                    for _ in range(rng.randint(1, 4))
+                ]
+                blocks.append("\n".join(lines))
+            md = "\n\n".join(blocks)
+
+            try:
+                expected = markdown_to_htmlnode(md).to_html()
+            except ValueError:
+                with self.assertRaises(ValueError, msg=md):
+                    markdown_to_html(md)
+                continue
+            self.assertEqual(expected, markdown_to_html(md), md)
+
+
+
+class TestMarkdownFile(TempTreeTestCase):
+    def test_file_blocks_match_string_blocks(self):
+        md = "# Title\n\nSome *text*\nhere\n\n```\ncode\n\nmore\n```\n\n* a\n* b\n"
+        path = os.path.join(self.root, "page.md")
+        with open(path, "w", newline="\r\n") as file:
+            file.write(md)
+        self.assertEqual(markdown_to_blocks(md), list(iter_markdown_file_blocks(path)))
+        self.assertEqual(
+            markdown_to_htmlnode(md).to_html(), MarkdownFileNode(path).to_html()
+        )
+
+    def test_file_blocks_match_string_blocks_with_unicode_whitespace(self):
+        self.assertEqual(
+            [], [code for code in range(0x3001, 0x110000) if chr(code).isspace()]
+        )
+        rng = random.Random(7)
+        pieces = ["para", "# T", "```", "\n", "\n", " ", "\t", "\xa0", "\u2003"]
+        pieces += ["\u3000", "\x85", "\x1c", "\u2028", "\r\n", "é"]
+        path = os.path.join(self.root, "page.md")
+        for _ in range(300):
+            md = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 30)))
+            with open(path, "w", newline="") as file:
+                file.write(md)
+            with open(path) as file:
+                expected = markdown_to_blocks(file.read())
+            self.assertEqual(expected, list(iter_markdown_file_blocks(path)), repr(md))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,73 @@
+import os
+import unittest
+
+from build_manifest import IncrementalPlan, empty_manifest
+from temp_tree import TempTreeTestCase
+
+
+class TestBuildManifest(TempTreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.template_path = self.write("template.html", "{{ Content }}")
+        self.jobs = [
+            (self.write("a.md", "# a"), os.path.join(self.root, "a.html")),
+            (self.write("b.md", "# b"), os.path.join(self.root, "b.html")),
+        ]
+
+    def build(self, jobs, manifest):
+        # the stale jobs, the outputs to remove and the new manifest, the way
+        # main.build_pages drives the plan
+        plan = IncrementalPlan(self.template_path, manifest)
+        stale_jobs = []
+        for job in plan.stale_jobs(iter(jobs)):
+            stale_jobs.append(job)
+            self.write(os.path.basename(job[1]), "")
+        removed_outputs, new_manifest = plan.finish()
+        return stale_jobs, removed_outputs, new_manifest
+
+    def test_first_build_renders_everything(self):
+        stale_jobs, removed_outputs, _ = self.build(self.jobs, empty_manifest())
+        self.assertEqual(self.jobs, stale_jobs)
+        self.assertEqual([], removed_outputs)
+
+    def test_unchanged_tree_renders_nothing(self):
+        _, _, manifest = self.build(self.jobs, empty_manifest())
+        stale_jobs, removed_outputs, _ = self.build(self.jobs, manifest)
+        self.assertEqual([], stale_jobs)
+        self.assertEqual([], removed_outputs)
+
+    def test_edit_rebuilds_only_that_page(self):
+        _, _, manifest = self.build(self.jobs, empty_manifest())
+        self.write("b.md", "# b edited")
+        stale_jobs, _, _ = self.build(self.jobs, manifest)
+        self.assertEqual([self.jobs[1]], stale_jobs)
+
+    def test_touch_without_edit_is_skipped(self):
+        _, _, manifest = self.build(self.jobs, empty_manifest())
+        os.utime(self.jobs[0][0], ns=(0, 0))
+        stale_jobs, _, manifest = self.build(self.jobs, manifest)
+        self.assertEqual([], stale_jobs)
+        self.assertEqual(0, manifest["pages"][self.jobs[0][0]]["mtime"])
+
+    def test_template_change_rebuilds_everything(self):
+        _, _, manifest = self.build(self.jobs, empty_manifest())
+        self.write("template.html", "<main>{{ Content }}</main>")
+        stale_jobs, _, _ = self.build(self.jobs, manifest)
+        self.assertEqual(self.jobs, stale_jobs)
+
+    def test_removed_source_removes_output(self):
+        _, _, manifest = self.build(self.jobs, empty_manifest())
+        stale_jobs, removed_outputs, manifest = self.build(self.jobs[:1], manifest)
+        self.assertEqual([], stale_jobs)
+        self.assertEqual([self.jobs[1][1]], removed_outputs)
+        self.assertNotIn(self.jobs[1][0], manifest["pages"])
+
+    def test_missing_output_is_rebuilt(self):
+        _, _, manifest = self.build(self.jobs, empty_manifest())
+        os.remove(self.jobs[0][1])
+        stale_jobs, _, _ = self.build(self.jobs, manifest)
+        self.assertEqual([self.jobs[0]], stale_jobs)
+
+
+if __name__ == "__main__":
+    unittest.main()
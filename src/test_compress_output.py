@@ -0,0 +1,62 @@
+import gzip
+import os
+import unittest
+
+from compress_output import precompress_tree
+from temp_tree import TempTreeTestCase
+
+
+class TestCompressOutput(TempTreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.page = self.write("index.html", "<p>hello</p>" * 200)
+        self.write("small.css", "body {}")
+        self.write("image.png", "png" * 1000)
+
+    def test_compresses_large_text_outputs(self):
+        variants, stats = precompress_tree(self.root, min_size=100)
+        self.assertEqual(["index.html.gz"], variants)
+        self.assertEqual(1, stats["compressed"])
+        self.assertEqual(1, stats["skipped"])
+        self.assertEqual(
+            ["image.png", "index.html", "index.html.gz", "small.css"],
+            sorted(os.listdir(self.root)),
+        )
+        with gzip.open(f"{self.page}.gz", "rt") as file:
+            self.assertEqual("<p>hello</p>" * 200, file.read())
+
+    def test_up_to_date_variants_are_skipped(self):
+        precompress_tree(self.root, min_size=100)
+        _, stats = precompress_tree(self.root, min_size=100)
+        self.assertEqual(0, stats["compressed"])
+        self.assertEqual(1, stats["unchanged"])
+
+    def test_changed_source_is_recompressed(self):
+        precompress_tree(self.root, min_size=100)
+        self.write("index.html", "<p>changed</p>" * 200)
+        os.utime(self.page, ns=(0, 0))
+        _, stats = precompress_tree(self.root, min_size=100)
+        self.assertEqual(1, stats["compressed"])
+        with gzip.open(f"{self.page}.gz", "rt") as file:
+            self.assertEqual("<p>changed</p>" * 200, file.read())
+
+    def test_orphaned_variants_are_removed(self):
+        variants, _ = precompress_tree(self.root, min_size=100)
+        os.remove(self.page)
+        variants, stats = precompress_tree(self.root, 100, previous_variants=variants)
+        self.assertEqual(1, stats["removed"])
+        self.assertEqual([], variants)
+        self.assertFalse(os.path.exists(f"{self.page}.gz"))
+
+    def test_standalone_gz_assets_are_kept(self):
+        asset = self.write("data.csv.gz", "csv")
+        archive = self.write("notes.txt.gz", "not written by the build")
+        variants, _ = precompress_tree(self.root, min_size=100)
+        _, stats = precompress_tree(self.root, 100, previous_variants=variants)
+        self.assertEqual(0, stats["removed"])
+        self.assertTrue(os.path.exists(asset))
+        self.assertTrue(os.path.exists(archive))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import unittest
+
+from copy_static import sync_static
+from temp_tree import TempTreeTestCase
+
+
+class TestSyncStatic(TempTreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.src = os.path.join(self.root, "static")
+        self.dest = os.path.join(self.root, "public")
+        self.write("static/index.css", "body {}")
+        self.write("static/images/a.png", "png")
+
+    def read(self, name: str):
+        with open(os.path.join(self.dest, name)) as file:
+            return file.read()
+
+    def test_first_sync_copies_everything(self):
+        files, stats = sync_static(self.src, self.dest)
+        self.assertEqual([os.path.join("images", "a.png"), "index.css"], sorted(files))
+        self.assertEqual(2, stats["copied"])
+        self.assertEqual("png", self.read("images/a.png"))
+
+    def test_second_sync_is_noop(self):
+        files, _ = sync_static(self.src, self.dest)
+        _, stats = sync_static(self.src, self.dest, files)
+        self.assertEqual({"copied": 0, "unchanged": 2, "removed": 0}, stats)
+
+    def test_changed_file_is_copied(self):
+        files, _ = sync_static(self.src, self.dest)
+        self.write("static/index.css", "body { margin: 0 }")
+        _, stats = sync_static(self.src, self.dest, files)
+        self.assertEqual(1, stats["copied"])
+        self.assertEqual("body { margin: 0 }", self.read("index.css"))
+
+    def test_hash_skips_touched_file(self):
+        files, _ = sync_static(self.src, self.dest)
+        os.utime(os.path.join(self.src, "index.css"), ns=(0, 0))
+        _, stats = sync_static(self.src, self.dest, files, use_hash=True)
+        self.assertEqual(0, stats["copied"])
+        self.assertEqual(0, os.stat(os.path.join(self.dest, "index.css")).st_mtime_ns)
+
+    def test_orphans_are_removed_but_other_files_kept(self):
+        files, _ = sync_static(self.src, self.dest)
+        self.write("public/index.html", "page")
+        os.remove(os.path.join(self.src, "images", "a.png"))
+        _, stats = sync_static(self.src, self.dest, files)
+        self.assertEqual(1, stats["removed"])
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "images")))
+        self.assertEqual("page", self.read("index.html"))
+
+    def test_dest_names_rename_files(self):
+        dest_names = {"index.css": "index.0967115f.css"}
+        files, _ = sync_static(self.src, self.dest, dest_names=dest_names)
+        self.assertIn("index.0967115f.css", files)
+        self.assertEqual("body {}", self.read("index.0967115f.css"))
+
+        _, stats = sync_static(self.src, self.dest, files)
+        self.assertEqual(1, stats["removed"])
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "index.0967115f.css")))
+
+    def test_hardlink(self):
+        files, _ = sync_static(self.src, self.dest, hardlink=True)
+        src_path = os.path.join(self.src, "index.css")
+        dest_path = os.path.join(self.dest, "index.css")
+        self.assertTrue(os.path.samefile(src_path, dest_path))
+        _, stats = sync_static(self.src, self.dest, files, hardlink=True)
+        self.assertEqual(2, stats["unchanged"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import unittest
+
+from discovery import is_ignored, iter_files, iter_page_jobs
+from temp_tree import TempTreeTestCase
+
+
+class TestDiscovery(TempTreeTestCase):
+    def test_is_ignored(self):
+        self.assertTrue(is_ignored("content/.git"))
+        self.assertTrue(is_ignored("static/.DS_Store"))
+        self.assertTrue(is_ignored("content/.index.md.swp"))
+        self.assertFalse(is_ignored("content/.well-known"))
+
+    def test_iter_files_is_sorted_and_skips_ignored(self):
+        for rel_path in (
+            "b.md",
+            "a/z.md",
+            "a/b/c.md",
+            "a/.a.md.swp",
+            ".git/HEAD",
+            "a/__pycache__/x.pyc",
+            "c.png",
+        ):
+            self.write(rel_path)
+        os.makedirs(os.path.join(self.root, "empty"))
+
+        self.assertEqual(
+            [
+                os.path.join("a", "b", "c.md"),
+                os.path.join("a", "z.md"),
+                "b.md",
+                "c.png",
+            ],
+            [rel_path for rel_path, _ in iter_files(self.root)],
+        )
+        self.assertEqual(
+            ["b.md"],
+            [
+                rel_path
+                for rel_path, _ in iter_files(self.root, lambda name: name == "a")
+                if rel_path.endswith(".md")
+            ],
+        )
+
+    def test_iter_page_jobs_only_yields_markdown(self):
+        self.write("index.md")
+        self.write("blog/post.md")
+        self.write("blog/image.png")
+        self.write("blog/post.md~")
+        jobs = iter_page_jobs(self.root, "public")
+        self.assertEqual(
+            (
+                os.path.join(self.root, "blog", "post.md"),
+                os.path.join("public", "blog", "post.html"),
+            ),
+            next(jobs),
+        )
+        self.assertEqual(
+            [
+                (
+                    os.path.join(self.root, "index.md"),
+                    os.path.join("public", "index.html"),
+                )
+            ],
+            list(jobs),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+
+from etag_manifest import ETAG_MANIFEST_NAME, load_etag_manifest, write_etag_manifest
+from temp_tree import TempTreeTestCase
+
+
+class TestEtagManifest(TempTreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("index.html", "<p>home</p>")
+        self.write("majesty/index.html", "<p>majesty</p>")
+
+    def test_every_file_gets_a_strong_etag(self):
+        self.assertEqual(2, write_etag_manifest(self.root))
+        entries = load_etag_manifest(self.root)
+        self.assertEqual(["index.html", "majesty/index.html"], sorted(entries))
+        self.assertNotIn(ETAG_MANIFEST_NAME, entries)
+        etag = entries["index.html"]["etag"]
+        self.assertTrue(etag.startswith('"') and etag.endswith('"'))
+        self.assertNotEqual(etag, entries["majesty/index.html"]["etag"])
+
+    def test_changed_file_gets_new_etag(self):
+        write_etag_manifest(self.root)
+        before = load_etag_manifest(self.root)
+        self.write("index.html", "<p>new home</p>")
+        write_etag_manifest(self.root)
+        after = load_etag_manifest(self.root)
+        self.assertNotEqual(before["index.html"]["etag"], after["index.html"]["etag"])
+        self.assertEqual(before["majesty/index.html"], after["majesty/index.html"])
+
+
+if __name__ == "__main__":
+    unittest.main()
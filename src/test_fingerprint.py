@@ -0,0 +1,86 @@
+import os
+import unittest
+
+from fingerprint import (
+    asset_dest_names,
+    build_asset_map,
+    load_asset_manifest,
+    resolve_asset_url,
+    rewrite_references,
+    set_asset_map,
+    write_asset_manifest,
+)
+from temp_tree import TempTreeTestCase
+from textnode import TextNode, TextType, text_node_to_html_node
+
+ASSET_MAP = {
+    "/index.css": "/index.228271f1.css",
+    "/images/rivendell.png": "/images/rivendell.72945f7e.png",
+}
+
+
+class TestFingerprint(TempTreeTestCase):
+    def setUp(self):
+        super().setUp()
+        set_asset_map(ASSET_MAP)
+
+    def tearDown(self):
+        set_asset_map(None)
+
+    def test_build_asset_map(self):
+        for name in ("index.css", "images/a.png", "images/b.png"):
+            self.write(name, "same")
+        asset_map = build_asset_map(self.root)
+        self.assertEqual(
+            {
+                "/index.css": "/index.0967115f.css",
+                "/images/a.png": "/images/a.0967115f.png",
+                "/images/b.png": "/images/b.0967115f.png",
+            },
+            asset_map,
+        )
+        self.assertEqual(
+            os.path.join("images", "a.0967115f.png"),
+            asset_dest_names(asset_map)[os.path.join("images", "a.png")],
+        )
+
+    def test_asset_manifest_round_trip(self):
+        self.assertEqual({}, load_asset_manifest(self.root))
+        write_asset_manifest(self.root, ASSET_MAP)
+        self.assertEqual(ASSET_MAP, load_asset_manifest(self.root))
+        self.write("asset-manifest.json", "[]")
+        self.assertEqual({}, load_asset_manifest(self.root))
+
+    def test_resolve_asset_url(self):
+        self.assertEqual("/index.228271f1.css", resolve_asset_url("/index.css"))
+        self.assertEqual("/index.228271f1.css?v=1", resolve_asset_url("/index.css?v=1"))
+        self.assertEqual("/unknown.css", resolve_asset_url("/unknown.css"))
+        self.assertEqual("https://boot.dev", resolve_asset_url("https://boot.dev"))
+
+    def test_rewrite_references(self):
+        html = '<link href="/index.css" rel="stylesheet" /><a href="/">home</a>'
+        self.assertEqual(
+            '<link href="/index.228271f1.css" rel="stylesheet" /><a href="/">home</a>',
+            rewrite_references(html),
+        )
+
+    def test_rendered_urls_are_rewritten(self):
+        image = TextNode("LOTR", TextType.IMAGE, "/images/rivendell.png")
+        self.assertEqual(
+            '<img src="/images/rivendell.72945f7e.png" alt="LOTR"></img>',
+            text_node_to_html_node(image).to_html(),
+        )
+        link = TextNode("styles", TextType.LINK, "/index.css")
+        self.assertEqual(
+            '<a href="/index.228271f1.css">styles</a>',
+            text_node_to_html_node(link).to_html(),
+        )
+
+    def test_without_asset_map_urls_are_kept(self):
+        set_asset_map(None)
+        self.assertEqual("/index.css", resolve_asset_url("/index.css"))
+        self.assertEqual('href="/index.css"', rewrite_references('href="/index.css"'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import unittest
+
+from discovery import iter_page_jobs
+from html_generation import PageGenerationError, generate_pages
+from temp_tree import TempTreeTestCase
+
+
+class TestHtmlGeneration(TempTreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.template_path = self.write(
+            "template.html", "<title>{{ Title }}</title>{{ Content }}"
+        )
+        for i in range(6):
+            self.write(f"content/{i}/index.md", f"# page {i}\n\nsome *text*")
+
+    def read_tree(self, root: str):
+        tree = {}
+        for dir_path, _, file_names in os.walk(root):
+            for file_name in file_names:
+                path = os.path.join(dir_path, file_name)
+                with open(path) as file:
+                    tree[os.path.relpath(path, root)] = file.read()
+        return tree
+
+    def build(self, dest_name: str, processes: int, streamed: bool = False):
+        dest_dir = os.path.join(self.root, dest_name)
+        jobs = iter_page_jobs(os.path.join(self.root, "content"), dest_dir)
+        generate_pages(jobs if streamed else list(jobs), self.template_path, processes)
+        return self.read_tree(dest_dir)
+
+    def test_parallel_build_matches_serial_build(self):
+        serial = self.build("serial", 1)
+        parallel = self.build("parallel", 3)
+        self.assertEqual(6, len(serial))
+        self.assertEqual(serial, parallel)
+        self.assertEqual(
+            "<title>page 0</title><div><h1>page 0</h1><p>some <i>text</i></p></div>",
+            serial[os.path.join("0", "index.html")],
+        )
+
+    def test_streamed_jobs_match_listed_jobs(self):
+        serial = self.build("serial", 1)
+        self.assertEqual(serial, self.build("streamed", 3, streamed=True))
+        self.assertEqual(serial, self.build("streamed_serial", 1, streamed=True))
+
+    def test_parallel_error_names_source(self):
+        bad_path = self.write("content/3/index.md", "no title here")
+        with self.assertRaises(PageGenerationError) as context:
+            self.build("parallel", 3)
+        self.assertEqual(bad_path, context.exception.src_path)
+        self.assertIn(bad_path, str(context.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,4 @@
+from io import StringIO
 import unittest
 
 from htmlnode import HtmlNode, LeafNode, ParentNode
@@ -91,6 +92,29 @@ class TestHtmlNode(unittest.TestCase):
             "<div><span><b>grandchild</b></span></div>",
         )
 
+    def test_write_to(self):
+        parent_node = ParentNode(
+            "div",
+            [ParentNode("p", [LeafNode("b", "bold"), LeafNode(None, " text")])],
+            {"class": "content"},
+        )
+        buffer = StringIO()
+        buffer.write("<body>")
+        parent_node.write_to(buffer)
+        self.assertEqual(
+            '<body><div class="content"><p><b>bold</b> text</p></div>',
+            buffer.getvalue(),
+        )
+        self.assertEqual(buffer.getvalue()[6:], parent_node.to_html())
+
+    def test_deep_nesting(self):
+        node = LeafNode("b", "leaf")
+        for _ in range(200):
+            node = ParentNode("span", [node])
+        self.assertEqual(
+            "<span>" * 200 + "<b>leaf</b>" + "</span>" * 200, node.to_html()
+        )
+
     # LeafNode
     def test_leafnode_to_html(self):
         link_node = LeafNode(
@@ -177,6 +177,38 @@ class TestInlineMarkdown(unittest.TestCase):
             text_to_textnodes(text),
         )
 
+    def test_text_to_textnodes_image_inside_brackets(self):
+        text = "[see ![image](https://boot.dev/a.png) here"
+        self.assertEqual(
+            [
+                TextNode("[see ", TextType.TEXT),
+                TextNode("image", TextType.IMAGE, "https://boot.dev/a.png"),
+                TextNode(" here", TextType.TEXT),
+            ],
+            text_to_textnodes(text),
+        )
+
+    def test_text_to_textnodes_many_links(self):
+        text = " ".join(f"[link {i}](https://boot.dev/{i})" for i in range(1000))
+        nodes = text_to_textnodes(text)
+        self.assertEqual(1999, len(nodes))
+        self.assertEqual(
+            TextNode("link 999", TextType.LINK, "https://boot.dev/999"), nodes[-1]
+        )
+
+    def test_text_to_textnodes_many_bare_brackets(self):
+        # footnote style brackets open no link; each used to rescan the rest of
+        # the text, which took seconds at this size
+        text = "[a] b " * 20000
+        self.assertEqual([TextNode(text, TextType.TEXT)], text_to_textnodes(text))
+        self.assertEqual(
+            [TextNode("[a](b\nc)", TextType.TEXT)], text_to_textnodes("[a](b\nc)")
+        )
+
+    def test_text_to_textnodes_not_closed(self):
+        with self.assertRaises(ValueError):
+            text_to_textnodes("This is **not closed")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,67 @@
+import os
+import unittest
+
+from output_writer import (
+    OutputWriteError,
+    OutputWriter,
+    remove_untracked,
+    write_if_changed,
+)
+from temp_tree import TempTreeTestCase
+
+
+class TestOutputWriter(TempTreeTestCase):
+    def test_identical_write_keeps_file(self):
+        path = os.path.join(self.root, "nested", "index.html")
+        self.assertTrue(write_if_changed(path, b"<p>one</p>"))
+        os.utime(path, ns=(1, 1))
+
+        self.assertFalse(write_if_changed(path, b"<p>one</p>"))
+        self.assertEqual(1, os.stat(path).st_mtime_ns)
+
+        # same size, different bytes
+        self.assertTrue(write_if_changed(path, b"<p>two</p>"))
+        with open(path, "rb") as file:
+            self.assertEqual(b"<p>two</p>", file.read())
+        self.assertEqual(["index.html"], os.listdir(os.path.dirname(path)))
+
+    def test_writer_counts_written_and_skipped(self):
+        writer = OutputWriter(max_workers=2, max_pending=2)
+        self.addCleanup(writer.close)
+        paths = [os.path.join(self.root, f"{i}", "page.html") for i in range(10)]
+        for path in paths:
+            writer.write(path, path.encode())
+        self.assertEqual({"written": 10, "skipped": 0}, writer.flush())
+
+        for path in paths[:4]:
+            writer.write(path, path.encode())
+        writer.write(paths[4], b"changed")
+        self.assertEqual({"written": 1, "skipped": 4}, writer.flush())
+
+    def test_writer_reports_failed_source(self):
+        writer = OutputWriter()
+        self.addCleanup(writer.close)
+        blocker = os.path.join(self.root, "file")
+        write_if_changed(blocker, b"")
+        writer.write(os.path.join(blocker, "page.html"), b"x", "content/page.md")
+        with self.assertRaises(OutputWriteError) as context:
+            writer.flush()
+        self.assertEqual("content/page.md", context.exception.source)
+
+
+    def test_remove_untracked(self):
+        for rel_path in ("index.html", "old/page.html", "blog/post.html", "blog/x"):
+            self.write(rel_path)
+        keep = {"index.html", os.path.join("blog", "post.html"), "missing.html"}
+        removed = remove_untracked(self.root, keep)
+        self.assertEqual(
+            sorted(
+                os.path.join(self.root, rel_path)
+                for rel_path in ("old/page.html", "blog/x")
+            ),
+            sorted(removed),
+        )
+        self.assertEqual(["blog", "index.html"], sorted(os.listdir(self.root)))
+
+if __name__ == "__main__":
+    unittest.main()
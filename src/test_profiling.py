@@ -0,0 +1,53 @@
+import unittest
+
+from profiling import NULL_STAGE, Profiler, enable_profiling, get_profiler, stage
+
+
+class TestProfiling(unittest.TestCase):
+    def tearDown(self):
+        enable_profiling(False)
+
+    def test_disabled_stage_is_shared_noop(self):
+        enable_profiling(False)
+        self.assertIs(NULL_STAGE, stage("read"))
+        with stage("read"):
+            pass
+        self.assertIsNone(get_profiler())
+
+    def test_nested_stages_split_self_time(self):
+        enable_profiling(True)
+        with stage("page"):
+            with stage("read"):
+                pass
+            with stage("read"):
+                pass
+        stages = get_profiler().stages
+        self.assertEqual(1, stages["page"][2])
+        self.assertEqual(2, stages["read"][2])
+        page_total, page_self, _ = stages["page"]
+        self.assertAlmostEqual(page_total - stages["read"][0], page_self)
+        self.assertEqual([], get_profiler().events)
+
+    def test_trace_events(self):
+        enable_profiling(True, trace=True)
+        with stage("read"):
+            pass
+        (event,) = get_profiler().events
+        self.assertEqual("read", event["name"])
+        self.assertEqual("X", event["ph"])
+
+    def test_take_and_merge(self):
+        worker = Profiler()
+        worker.record("read", 0.0, 2.0, 0.5)
+        worker.pages["a.md"] = 2.0
+        parent = Profiler()
+        parent.record("read", 0.0, 1.0, 0.0)
+        parent.merge(worker.take())
+        self.assertEqual([3.0, 2.5, 2], parent.stages["read"])
+        self.assertEqual({"a.md": 2.0}, parent.pages)
+        self.assertEqual({}, worker.stages)
+        self.assertIn("a.md", parent.report())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import sqlite3
+import unittest
+
+from block_markdown import markdown_to_htmlnode
+from render_cache import BlockRenderCache
+from temp_tree import TempTreeTestCase
+
+
+class TestRenderCache(TempTreeTestCase):
+    def test_hits_and_misses(self):
+        cache = BlockRenderCache()
+        self.assertIsNone(cache.get("# heading"))
+        cache.put("# heading", "<h1>heading</h1>")
+        self.assertEqual("<h1>heading</h1>", cache.get("# heading"))
+        self.assertEqual({"cache_hits": 1, "cache_misses": 1}, cache.take_stats())
+        self.assertEqual({"cache_hits": 0, "cache_misses": 0}, cache.take_stats())
+
+    def test_lru_eviction(self):
+        cache = BlockRenderCache(max_entries=2)
+        cache.put("a", "<p>a</p>")
+        cache.put("b", "<p>b</p>")
+        cache.get("a")
+        cache.put("c", "<p>c</p>")
+        self.assertEqual("<p>a</p>", cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual("<p>c</p>", cache.get("c"))
+
+    def test_store_persists_between_caches(self):
+        store_path = os.path.join(self.root, "blocks.sqlite")
+        cache = BlockRenderCache(store_path=store_path)
+        cache.put("a", "<p>a</p>")
+        cache.close()
+
+        cache = BlockRenderCache(store_path=store_path)
+        self.assertEqual("<p>a</p>", cache.get("a"))
+        cache.close()
+
+    def test_store_writes_wait_for_flush(self):
+        store_path = os.path.join(self.root, "blocks.sqlite")
+        cache = BlockRenderCache(max_entries=0, store_path=store_path)
+        cache.put("a", "<p>a</p>")
+        self.assertEqual("<p>a</p>", cache.get("a"))
+
+        # another worker can write while this one is still rendering its page
+        other = sqlite3.connect(store_path, timeout=0)
+        other.execute("BEGIN IMMEDIATE")
+        other.rollback()
+        self.assertEqual(0, other.execute("SELECT COUNT(*) FROM blocks").fetchone()[0])
+
+        cache.flush()
+        self.assertEqual(1, other.execute("SELECT COUNT(*) FROM blocks").fetchone()[0])
+        other.close()
+        cache.close()
+
+    def test_store_prunes_least_recently_used(self):
+        store_path = os.path.join(self.root, "blocks.sqlite")
+        cache = BlockRenderCache(store_path=store_path)
+        for block in "abcd":
+            cache.put(block, f"<p>{block}</p>")
+        cache.close()
+
+        # a later run that reads "b" keeps it over blocks it did not use
+        cache = BlockRenderCache(
+            max_entries=0, store_path=store_path, store_max_entries=3
+        )
+        cache.used += 1
+        self.assertEqual("<p>b</p>", cache.get("b"))
+        cache.put("e", "<p>e</p>")
+        cache.put("f", "<p>f</p>")
+        cache.close()
+
+        store = sqlite3.connect(store_path)
+        keys = {key for key, in store.execute("SELECT key FROM blocks")}
+        store.close()
+        self.assertEqual({cache.key(block) for block in "bef"}, keys)
+
+    def test_cached_markdown_renders_the_same(self):
+        md = """
+# heading
+
+This is **bolded** paragraph
+
+- This is a list
+- with *items*
+
+```
+code
+```
+
+This is **bolded** paragraph
+"""
+        cache = BlockRenderCache()
+        expected = markdown_to_htmlnode(md).to_html()
+        self.assertEqual(expected, markdown_to_htmlnode(md, cache).to_html())
+        self.assertEqual({"cache_hits": 1, "cache_misses": 4}, cache.take_stats())
+        self.assertEqual(expected, markdown_to_htmlnode(md, cache).to_html())
+        self.assertEqual({"cache_hits": 5, "cache_misses": 0}, cache.take_stats())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,382 @@
+import email
+from functools import partial
+import http.client
+from http.server import ThreadingHTTPServer
+import json
+import os
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from etag_manifest import ETAG_MANIFEST_NAME  # noqa: E402
+from fingerprint import ASSET_MANIFEST_NAME  # noqa: E402
+from server import (  # noqa: E402
+    CachingHTTPRequestHandler,
+    CORSHTTPRequestHandler,
+    FileCache,
+    RoutedHTTPRequestHandler,
+    RouteTable,
+    accepts_encoding,
+    parse_range_header,
+)
+from temp_tree import TempTreeTestCase  # noqa: E402
+
+
+def quiet(handler_class):
+    class QuietHandler(handler_class):
+        def log_message(self, format, *args):
+            pass
+
+    return QuietHandler
+
+
+class RecordingServer(ThreadingHTTPServer):
+    # a handler that fails after its response went out leaves the client
+    # unaware, so failures are kept for the test to check
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.errors = []
+
+    def handle_error(self, request, client_address):
+        self.errors.append(repr(sys.exc_info()[1]))
+
+
+class TestRangeHeader(unittest.TestCase):
+    def test_ranges(self):
+        self.assertEqual([(0, 9)], parse_range_header("bytes=0-9", 100))
+        self.assertEqual([(90, 99)], parse_range_header("bytes=90-", 100))
+        self.assertEqual([(90, 99)], parse_range_header("bytes=-10", 100))
+        self.assertEqual([(0, 99)], parse_range_header("bytes=-500", 100))
+        self.assertEqual([(50, 99)], parse_range_header("bytes=50-500", 100))
+        # sorted, with overlapping and adjacent ranges merged
+        self.assertEqual(
+            [(0, 19), (30, 39)],
+            parse_range_header("bytes=30-39, 10-19, 0-9, 5-12", 100),
+        )
+
+    def test_unsatisfiable_ranges(self):
+        self.assertEqual([], parse_range_header("bytes=100-", 100))
+        self.assertEqual([], parse_range_header("bytes=-0", 100))
+        self.assertEqual([], parse_range_header("bytes=0-", 0))
+
+    def test_invalid_ranges_are_ignored(self):
+        for header in ("bytes=5-3", "bytes=a-b", "bytes=-", "items=0-9", "bytes=1"):
+            self.assertIsNone(parse_range_header(header, 100), header)
+        many = "bytes=" + ", ".join(f"{i * 3}-{i * 3}" for i in range(40))
+        self.assertIsNone(parse_range_header(many, 1000))
+
+
+class TestAcceptsEncoding(unittest.TestCase):
+    def test_accepts_encoding(self):
+        self.assertTrue(accepts_encoding("gzip, br", "gzip"))
+        self.assertTrue(accepts_encoding("br;q=1, *;q=0.5", "gzip"))
+        self.assertFalse(accepts_encoding(None, "gzip"))
+        self.assertFalse(accepts_encoding("gzip;q=0", "gzip"))
+        self.assertFalse(accepts_encoding("gzip;q=0.000", "gzip"))
+        # an explicit entry wins over the wildcard
+        self.assertFalse(accepts_encoding("*, gzip;q=0", "gzip"))
+        self.assertTrue(accepts_encoding("*;q=0, gzip", "gzip"))
+
+
+class TestFileCache(TempTreeTestCase):
+    def test_eviction_and_invalidation(self):
+        cache = FileCache(max_bytes=10)
+        first = self.write("first", b"12345")
+        second = self.write("second", b"67890")
+        self.assertEqual(b"12345", cache.get(first, os.stat(first)))
+        self.assertEqual(b"67890", cache.get(second, os.stat(second)))
+        self.assertEqual(10, cache.size)
+
+        third = self.write("third", b"abc")
+        cache.get(third, os.stat(third))
+        self.assertEqual([second, third], list(cache.entries))
+
+        self.write("third", b"abcd")
+        os.utime(third, ns=(1, 1))
+        self.assertEqual(b"abcd", cache.get(third, os.stat(third)))
+        self.assertEqual(9, cache.size)
+
+
+class TestServer(TempTreeTestCase):
+    handler_class = CORSHTTPRequestHandler
+
+    def setUp(self):
+        super().setUp()
+        self.data = bytes(range(256)) * 40
+        self.write("data.bin", self.data)
+        self.write("empty.txt", b"")
+        self.write("sub/index.html", b"<p>sub</p>")
+        page = self.write("page.html", b"<p>page</p>" * 100)
+        self.write("page.html.gz", b"compressed")
+        stat = os.stat(page)
+        os.utime(f"{page}.gz", ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.write("app.3f2a1c9d.css", b"body {}")
+        self.write("photo.20240101.css", b"body {}")
+        self.etags = {"data.bin": {"etag": '"v1"'}}
+        self.serve()
+
+    def handler_kwargs(self):
+        return {}
+
+    def serve(self):
+        stat = os.stat(os.path.join(self.root, "data.bin"))
+        self.etags["data.bin"].update(mtime=stat.st_mtime_ns, size=stat.st_size)
+        handler = partial(
+            quiet(self.handler_class),
+            directory=self.root,
+            etags=self.etags,
+            immutable_paths={"app.3f2a1c9d.css"},
+            **self.handler_kwargs(),
+        )
+        server = RecordingServer(("localhost", 0), handler)
+        # cleanups run last in first out, this one after the server is closed
+        self.addCleanup(lambda: self.assertEqual([], server.errors))
+        # a short poll interval keeps shutdown from waiting half a second
+        threading.Thread(target=server.serve_forever, args=(0.01,), daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.port = server.server_address[1]
+
+    def request(self, path: str, method: str = "GET", **headers):
+        connection = http.client.HTTPConnection("localhost", self.port, timeout=5)
+        self.addCleanup(connection.close)
+        connection.request(method, path, headers=headers)
+        response = connection.getresponse()
+        return response, response.read()
+
+    def test_full_and_empty_bodies(self):
+        response, body = self.request("/data.bin")
+        self.assertEqual((200, self.data), (response.status, body))
+        self.assertEqual("bytes", response.getheader("Accept-Ranges"))
+
+        response, body = self.request("/empty.txt")
+        self.assertEqual((200, b""), (response.status, body))
+        response, body = self.request("/empty.txt", Range="bytes=0-")
+        self.assertEqual(416, response.status)
+        self.assertEqual("bytes */0", response.getheader("Content-Range"))
+
+    def test_single_range(self):
+        response, body = self.request("/data.bin", Range="bytes=10-19")
+        self.assertEqual((206, self.data[10:20]), (response.status, body))
+        self.assertEqual(
+            f"bytes 10-19/{len(self.data)}", response.getheader("Content-Range")
+        )
+        response, body = self.request("/data.bin", Range="bytes=-5")
+        self.assertEqual((206, self.data[-5:]), (response.status, body))
+
+    def test_multiple_ranges(self):
+        response, body = self.request("/data.bin", Range="bytes=0-9, 100-199, -5")
+        self.assertEqual(206, response.status)
+        self.assertEqual(len(body), int(response.getheader("Content-Length")))
+        content_type = response.getheader("Content-Type")
+        self.assertTrue(content_type.startswith("multipart/byteranges; boundary="))
+
+        message = email.message_from_bytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode() + body
+        )
+        parts = [
+            (part["Content-Range"], part.get_payload(decode=True))
+            for part in message.get_payload()
+        ]
+        length = len(self.data)
+        self.assertEqual(
+            [
+                (f"bytes 0-9/{length}", self.data[:10]),
+                (f"bytes 100-199/{length}", self.data[100:200]),
+                (f"bytes {length - 5}-{length - 1}/{length}", self.data[-5:]),
+            ],
+            parts,
+        )
+
+    def test_unsatisfiable_and_invalid_ranges(self):
+        response, _ = self.request("/data.bin", Range="bytes=99999-")
+        self.assertEqual(416, response.status)
+        self.assertEqual(
+            f"bytes */{len(self.data)}", response.getheader("Content-Range")
+        )
+        response, body = self.request("/data.bin", Range="bytes=9-1")
+        self.assertEqual((200, self.data), (response.status, body))
+
+    def test_if_range(self):
+        response, _ = self.request(
+            "/data.bin", Range="bytes=0-9", **{"If-Range": '"v1"'}
+        )
+        self.assertEqual(206, response.status)
+        response, body = self.request(
+            "/data.bin", Range="bytes=0-9", **{"If-Range": '"v0"'}
+        )
+        self.assertEqual((200, self.data), (response.status, body))
+        response, _ = self.request(
+            "/data.bin",
+            Range="bytes=0-9",
+            **{"If-Range": "Thu, 01 Jan 1970 00:00:00 GMT"},
+        )
+        self.assertEqual(200, response.status)
+
+    def test_precompressed_variant(self):
+        response, body = self.request("/page.html", **{"Accept-Encoding": "gzip"})
+        self.assertEqual(b"compressed", body)
+        self.assertEqual("gzip", response.getheader("Content-Encoding"))
+        self.assertEqual("Accept-Encoding", response.getheader("Vary"))
+
+        response, body = self.request("/page.html", **{"Accept-Encoding": "gzip;q=0"})
+        self.assertEqual(b"<p>page</p>" * 100, body)
+        self.assertIsNone(response.getheader("Content-Encoding"))
+
+        os.utime(os.path.join(self.root, "page.html"), ns=(1, 1))
+        response, body = self.request("/page.html", **{"Accept-Encoding": "gzip"})
+        self.assertEqual(b"<p>page</p>" * 100, body)
+
+    def test_not_modified(self):
+        response, _ = self.request("/data.bin", **{"If-None-Match": '"x", "v1"'})
+        self.assertEqual(304, response.status)
+        self.assertEqual('"v1"', response.getheader("ETag"))
+        response, _ = self.request("/data.bin", **{"If-None-Match": '"v0"'})
+        self.assertEqual(200, response.status)
+
+        last_modified = response.getheader("Last-Modified")
+        response, _ = self.request("/page.html", **{"If-Modified-Since": last_modified})
+        self.assertEqual(304, response.status)
+        response, _ = self.request(
+            "/page.html", **{"If-Modified-Since": "Thu, 01 Jan 1970 00:00:00 GMT"}
+        )
+        self.assertEqual(200, response.status)
+
+    def test_immutable_only_for_manifest_assets(self):
+        response, _ = self.request("/app.3f2a1c9d.css")
+        self.assertIn("immutable", response.getheader("Cache-Control"))
+        response, _ = self.request("/photo.20240101.css")
+        self.assertIsNone(response.getheader("Cache-Control"))
+
+
+class TestCachingServer(TestServer):
+    handler_class = CachingHTTPRequestHandler
+
+    def handler_kwargs(self):
+        # data.bin is bigger than the cache and goes through sendfile
+        self.file_cache = FileCache(max_bytes=4096)
+        return {"file_cache": self.file_cache}
+
+    def test_cached_body_follows_the_file(self):
+        path = self.write("note.txt", b"first")
+        self.assertEqual(b"first", self.request("/note.txt")[1])
+        self.assertIn(path, self.file_cache.entries)
+        self.assertNotIn(os.path.join(self.root, "data.bin"), self.file_cache.entries)
+
+        self.write("note.txt", b"second")
+        self.assertEqual(b"second", self.request("/note.txt")[1])
+
+
+class TestRoutedServer(TestServer):
+    handler_class = RoutedHTTPRequestHandler
+
+    def handler_kwargs(self):
+        # the table reads the manifests from the served directory
+        self.write_manifests(self.etags, ["app.3f2a1c9d.css"])
+        self.route_table = RouteTable(
+            self.root, lambda path: "text/html" if path.endswith(".html") else "x/y"
+        )
+        return {"file_cache": FileCache(1 << 20), "route_table": self.route_table}
+
+    def write_manifests(self, etags, immutable_paths):
+        self.write(ETAG_MANIFEST_NAME, json.dumps(etags))
+        asset_map = {f"/{path}.src": f"/{path}" for path in immutable_paths}
+        self.write(ASSET_MANIFEST_NAME, json.dumps(asset_map))
+
+    def test_options(self):
+        response, body = self.request("/", method="OPTIONS")
+        self.assertEqual((200, b""), (response.status, body))
+        self.assertEqual("0", response.getheader("Content-Length"))
+
+    def test_clean_urls_are_routed(self):
+        for path in ("/sub", "/sub/", "/sub/index.html"):
+            response, body = self.request(path)
+            self.assertEqual((200, b"<p>sub</p>"), (response.status, body), path)
+            self.assertEqual("text/html", response.getheader("Content-Type"))
+
+    def test_keep_alive(self):
+        connection = http.client.HTTPConnection("localhost", self.port, timeout=5)
+        self.addCleanup(connection.close)
+        sockets = set()
+        for path in ("/sub", "/data.bin", "/empty.txt"):
+            connection.request("GET", path)
+            response = connection.getresponse()
+            response.read()
+            self.assertFalse(response.will_close)
+            sockets.add(connection.sock)
+        self.assertEqual(1, len(sockets))
+
+    def test_routes_carry_their_headers(self):
+        route = self.route_table.lookup("/data.bin")
+        self.assertIn(("Content-Length", str(len(self.data))), route.body.headers)
+        self.assertIn(("ETag", '"v1"'), route.body.headers)
+        self.assertIsNone(route.gzip)
+        route = self.route_table.lookup("/page.html")
+        self.assertIn(("Content-Encoding", "gzip"), route.gzip.headers)
+        self.assertIn(("Vary", "Accept-Encoding"), route.body.validators)
+
+        # whole body responses send the stored headers, ranges are computed
+        headers = route.body.headers + (("X-Route", "1"),)
+        self.route_table.routes["/page.html"] = route._replace(
+            body=route.body._replace(headers=headers)
+        )
+        response, _ = self.request("/page.html")
+        self.assertEqual("1", response.getheader("X-Route"))
+        response, _ = self.request("/page.html", Range="bytes=0-9")
+        self.assertIsNone(response.getheader("X-Route"))
+
+    def test_file_changed_in_place(self):
+        # an in place write leaves the directory mtime alone
+        with open(os.path.join(self.root, "data.bin"), "r+b") as file:
+            file.write(b"changed")
+            file.truncate()
+        self.assertFalse(self.route_table.has_changed())
+        response, body = self.request("/data.bin")
+        self.assertEqual((200, b"changed"), (response.status, body))
+        self.assertIsNone(response.getheader("ETag"))
+        self.assertTrue(self.route_table.has_changed())
+        self.route_table.refresh()
+        route = self.route_table.lookup("/data.bin")
+        self.assertIn(("Content-Length", "7"), route.body.headers)
+
+    def test_manifests_reload_with_the_table(self):
+        page = os.stat(os.path.join(self.root, "page.html"))
+        entry = {"etag": '"p1"', "mtime": page.st_mtime_ns, "size": page.st_size}
+        etags = dict(self.etags, **{"page.html": entry})
+        self.write_manifests(etags, ["photo.20240101.css"])
+        self.assertTrue(self.route_table.has_changed())
+        self.route_table.refresh()
+
+        response, _ = self.request("/page.html")
+        self.assertEqual('"p1"', response.getheader("ETag"))
+        response, _ = self.request("/photo.20240101.css")
+        self.assertIn("immutable", response.getheader("Cache-Control"))
+        response, _ = self.request("/app.3f2a1c9d.css")
+        self.assertIsNone(response.getheader("Cache-Control"))
+
+    def test_route_table_follows_the_tree(self):
+        self.assertIn("/page.html", self.route_table.routes)
+        self.assertNotIn("/new", self.route_table.routes)
+        self.assertFalse(self.route_table.has_changed())
+
+        self.write("new/index.html", b"<p>new</p>")
+        self.assertTrue(self.route_table.has_changed())
+        self.route_table.refresh()
+        self.assertFalse(self.route_table.has_changed())
+        self.assertEqual(
+            os.path.join(self.root, "new", "index.html"),
+            self.route_table.lookup("/new").path,
+        )
+
+        # a routed file removed before the next refresh falls back to the
+        # default handling instead of failing the request
+        os.remove(os.path.join(self.root, "sub", "index.html"))
+        response, _ = self.request("/sub")
+        self.assertEqual(301, response.status)
+        self.assertIsNone(self.route_table.lookup("/sub"))
+
+
+if __name__ == "__main__":
+    unittest.main()
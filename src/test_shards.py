@@ -0,0 +1,112 @@
+import filecmp
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+from shards import (
+    SHARD_MANIFEST_NAME,
+    ShardMergeError,
+    merge_shards,
+    parse_shard,
+    select_shard,
+)
+from temp_tree import TempTreeTestCase
+
+MAIN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+
+class TestShards(TempTreeTestCase):
+    def write_shard(self, name: str, index: int, count: int, files):
+        for rel_path, content in files.items():
+            self.write(os.path.join(name, rel_path), content)
+        hashes = {
+            rel_path: hashlib.sha256(content.encode()).hexdigest()
+            for rel_path, content in files.items()
+        }
+        manifest = {"version": 1, "shard": index, "shards": count, "files": hashes}
+        self.write(os.path.join(name, SHARD_MANIFEST_NAME), json.dumps(manifest))
+        return os.path.join(self.root, name)
+
+    def build(self, *args: str):
+        subprocess.run(
+            [sys.executable, MAIN_PATH, *args],
+            cwd=self.root,
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+
+    def test_parse_shard(self):
+        self.assertEqual((2, 4), parse_shard("2/4"))
+        for value in ("4/4", "-1/4", "1", "a/b", "0/0"):
+            with self.assertRaises(ValueError):
+                parse_shard(value)
+
+    def test_shards_partition_the_pages(self):
+        jobs = [(f"content/{i}.md", f"public/{i}.html") for i in range(50)]
+        shards = [
+            list(select_shard(jobs, "content", index, 3)) for index in range(3)
+        ]
+        self.assertEqual(sorted(jobs), sorted(sum(shards, [])))
+        self.assertTrue(all(shards))
+        # membership depends on the page alone, not on the rest of the site
+        self.assertEqual(
+            [job for job in shards[1] if job != jobs[0]],
+            list(select_shard(jobs[1:], "content", 1, 3)),
+        )
+
+    def test_merged_shards_match_single_build(self):
+        self.write(
+            "template.html",
+            '<title>{{ Title }}</title><link href="/a.css">{{ Content }}',
+        )
+        self.write("static/a.css", "body { color: red }")
+        self.write("static/img/b.png", "png")
+        for i in range(12):
+            self.write(
+                f"content/section{i % 3}/page{i}.md", f"# Page {i}\n\nText *{i}*"
+            )
+
+        options = ["--fingerprint", "--precompress", "--precompress-min-size", "1"]
+        self.build(*options)
+        os.rename(os.path.join(self.root, "public"), os.path.join(self.root, "single"))
+        shard_dirs = []
+        for index in range(3):
+            shard_dirs.append(f"shards/{index}")
+            self.build(
+                *options, "--shard", f"{index}/3", "--shard-dir", shard_dirs[-1]
+            )
+        self.build("--merge-shards", *shard_dirs)
+
+        comparison = filecmp.dircmp(
+            os.path.join(self.root, "single"), os.path.join(self.root, "public")
+        )
+        pending = [comparison]
+        while pending:
+            comparison = pending.pop()
+            self.assertEqual([], comparison.left_only + comparison.right_only)
+            _, mismatch, errors = filecmp.cmpfiles(
+                comparison.left, comparison.right, comparison.common_files, False
+            )
+            self.assertEqual([], mismatch + errors)
+            pending += comparison.subdirs.values()
+
+    def test_merge_rejects_conflicting_outputs(self):
+        first = self.write_shard("a", 0, 2, {"index.html": "one"})
+        second = self.write_shard("b", 1, 2, {"index.html": "two"})
+        dest_dir = os.path.join(self.root, "public")
+        with self.assertRaisesRegex(ShardMergeError, "index.html"):
+            merge_shards([first, second], dest_dir)
+        self.assertFalse(os.path.exists(dest_dir))
+
+    def test_merge_rejects_missing_shards(self):
+        first = self.write_shard("a", 0, 3, {"index.html": "one"})
+        second = self.write_shard("b", 2, 3, {"other.html": "two"})
+        with self.assertRaisesRegex(ShardMergeError, "exactly once"):
+            merge_shards([first, second], os.path.join(self.root, "public"))
+
+
+if __name__ == "__main__":
+    unittest.main()
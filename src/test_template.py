@@ -0,0 +1,46 @@
+from io import StringIO
+import unittest
+
+from htmlnode import LeafNode, ParentNode
+from template import Template
+
+
+class TestTemplate(unittest.TestCase):
+    def test_parse(self):
+        template = Template("<title>{{ Title }}</title><p>{{Content}}</p>")
+        self.assertEqual(["<title>", "</title><p>", "</p>"], template.segments)
+        self.assertEqual(["Title", "Content"], template.slots)
+
+    def test_render(self):
+        template = Template("<title>{{ Title }}</title>{{ Content }}{{ Title }}")
+        self.assertEqual(
+            "<title>hi</title><p>body</p>hi",
+            template.render({"Title": "hi", "Content": "<p>body</p>"}),
+        )
+
+    def test_render_does_not_expand_values(self):
+        template = Template("{{ Content }}|{{ Title }}")
+        self.assertEqual(
+            "{{ Title }}|title",
+            template.render({"Content": "{{ Title }}", "Title": "title"}),
+        )
+
+    def test_render_keeps_unknown_placeholders(self):
+        template = Template("{{ Author }} wrote {{ Title }}")
+        self.assertEqual("{{ Author }} wrote book", template.render({"Title": "book"}))
+
+    def test_write_to_streams_html_nodes(self):
+        template = Template("<title>{{ Title }}</title>{{ Content }}")
+        buffer = StringIO()
+        template.write_to(
+            buffer,
+            {"Title": "hi", "Content": ParentNode("p", [LeafNode("b", "body")])},
+        )
+        self.assertEqual("<title>hi</title><p><b>body</b></p>", buffer.getvalue())
+
+    def test_render_without_placeholders(self):
+        self.assertEqual("<html></html>", Template("<html></html>").render({}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,18 @@
+from enum import Enum
 import unittest
 
-from textnode import TextNode, TextType
+from htmlnode import LeafNode
+from textnode import (
+    TEXT_RENDERERS,
+    TextNode,
+    TextType,
+    register_text_renderer,
+    text_node_to_html_node,
+)
+
+
+class ExtraTextType(Enum):
+    STRIKE = "strike"
 
 
 class TestTextNode(unittest.TestCase):
@@ -25,6 +37,18 @@ class TestTextNode(unittest.TestCase):
             "TextNode(This is a text node, text, https://www.boot.dev)", repr(node)
         )
 
+    def test_registered_text_renderer(self):
+        register_text_renderer(
+            ExtraTextType.STRIKE, lambda text_node: LeafNode("s", text_node.text)
+        )
+        self.addCleanup(TEXT_RENDERERS.pop, ExtraTextType.STRIKE)
+        node = TextNode("gone", ExtraTextType.STRIKE)
+        self.assertEqual("<s>gone</s>", text_node_to_html_node(node).to_html())
+
+    def test_unknown_text_type(self):
+        with self.assertRaises(ValueError):
+            text_node_to_html_node(TextNode("gone", ExtraTextType.STRIKE))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,88 @@
+from contextlib import redirect_stdout
+import io
+import os
+import unittest
+
+from build_manifest import load_manifest
+from html_generation import RenderOptions
+from main import build_pages, manifest_path, rebuild_changed
+from temp_tree import TempTreeTestCase
+from watch import InotifyWatcher, PollingWatcher, is_ignored
+
+
+class TestWatch(TempTreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.template = self.write("template.html", "{{ Content }}")
+        self.page = self.write("content/nested/index.md", "# page")
+
+    def collect(self, watcher):
+        changed = set()
+        while True:
+            more = watcher.poll(0.2)
+            if not more:
+                return changed
+            changed |= more
+
+    def check_watcher(self, watcher):
+        try:
+            self.write("content/nested/index.md", "# edited")
+            self.assertEqual({self.page}, self.collect(watcher))
+
+            self.write("template.html", "<main>{{ Content }}</main>")
+            self.write("unwatched.txt", "")
+            self.assertEqual({self.template}, self.collect(watcher))
+
+            os.makedirs(os.path.join(self.content, "new"))
+            new_page = self.write("content/new/index.md", "# new")
+            self.assertIn(new_page, self.collect(watcher))
+
+            os.remove(self.page)
+            self.assertEqual({self.page}, self.collect(watcher))
+        finally:
+            watcher.close()
+
+    def test_polling_watcher(self):
+        # mtimes may not change within the same clock tick, sizes do
+        self.check_watcher(PollingWatcher([self.content, self.template], 0.01))
+
+    def test_inotify_watcher(self):
+        try:
+            watcher = InotifyWatcher([self.content, self.template])
+        except (OSError, AttributeError, TypeError):
+            self.skipTest("inotify is not available")
+        self.check_watcher(watcher)
+
+    def test_is_ignored(self):
+        self.assertTrue(is_ignored("content/.index.md.swp"))
+        self.assertTrue(is_ignored("content/index.md~"))
+        self.assertTrue(is_ignored("content/.#index.md"))
+        self.assertTrue(is_ignored("content/4913"))
+        self.assertFalse(is_ignored("content/index.md"))
+
+    def test_rebuild_skips_non_markdown_content(self):
+        # main works on paths relative to the site root
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.root)
+        notes = self.write("content/notes.txt", "no title here")
+        options = RenderOptions()
+        with redirect_stdout(io.StringIO()):
+            manifest = build_pages(load_manifest(manifest_path), 1, options)
+            self.write("content/nested/index.md", "# edited")
+            manifest, _ = rebuild_changed(
+                {"./content/notes.txt", "./content/nested/index.md"},
+                manifest,
+                1,
+                options,
+                False,
+                False,
+            )
+        self.assertEqual(["nested"], os.listdir("public"))
+        self.assertNotIn(notes, manifest["pages"])
+        with open("public/nested/index.html") as file:
+            self.assertIn("edited", file.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
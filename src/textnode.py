@@ -1,6 +1,7 @@
 from enum import Enum
-from typing import Dict, List, Union
+from typing import Callable, Dict, Optional, Union
 
+from fingerprint import resolve_asset_url
 from htmlnode import LeafNode
 
 
@@ -14,6 +15,8 @@ class TextType(Enum):
 
 
 class TextNode:
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text: str, text_type: TextType, url: Union[str, None] = None):
         self.text = text
         self.text_type = text_type
@@ -22,28 +25,96 @@ class TextNode:
     def __eq__(self, other):
         if not isinstance(other, TextNode):
             return False
-        return self.__dict__ == other.__dict__
+        return (
+            self.text_type is other.text_type
+            and self.text == other.text
+            and self.url == other.url
+        )
 
     def __repr__(self):
         return f"TextNode({self.text}, {self.text_type.value}, {self.url})"
 
 
+def _tag_renderer(tag: Optional[str]) -> Callable[[TextNode], LeafNode]:
+    return lambda text_node: LeafNode(tag, text_node.text)
+
+
+def _link_to_html_node(text_node: TextNode) -> LeafNode:
+    if text_node.url is None:
+        raise ValueError("Url is required for link node")
+    return LeafNode("a", text_node.text, {"href": resolve_asset_url(text_node.url)})
+
+
+def _image_to_html_node(text_node: TextNode) -> LeafNode:
+    if text_node.url is None:
+        raise ValueError("Url is required for image node")
+    return LeafNode(
+        "img", "", {"src": resolve_asset_url(text_node.url), "alt": text_node.text}
+    )
+
+
+# text type -> renderer, one dict lookup per node however many are registered
+TEXT_RENDERERS: Dict[Enum, Callable[[TextNode], LeafNode]] = {
+    TextType.TEXT: _tag_renderer(None),
+    TextType.BOLD: _tag_renderer("b"),
+    TextType.ITALIC: _tag_renderer("i"),
+    TextType.CODE: _tag_renderer("code"),
+    TextType.LINK: _link_to_html_node,
+    TextType.IMAGE: _image_to_html_node,
+}
+
+
+def _tag_html_renderer(tag: str) -> Callable[[str, Optional[str]], str]:
+    return lambda text, url: f"<{tag}>{text}</{tag}>"
+
+
+def _link_to_html(text: str, url: Optional[str]) -> str:
+    if url is None:
+        raise ValueError("Url is required for link node")
+    return f'<a href="{resolve_asset_url(url)}">{text}</a>'
+
+
+def _image_to_html(text: str, url: Optional[str]) -> str:
+    if url is None:
+        raise ValueError("Url is required for image node")
+    return f'<img src="{resolve_asset_url(url)}" alt="{text}"></img>'
+
+
+# text type -> markup built straight from the text and url, for the fast path
+# that skips the node trees; must match what the node renderer emits
+TEXT_HTML_RENDERERS: Dict[Enum, Callable[[str, Optional[str]], str]] = {
+    TextType.TEXT: lambda text, url: text,
+    TextType.BOLD: _tag_html_renderer("b"),
+    TextType.ITALIC: _tag_html_renderer("i"),
+    TextType.CODE: _tag_html_renderer("code"),
+    TextType.LINK: _link_to_html,
+    TextType.IMAGE: _image_to_html,
+}
+
+
+def register_text_renderer(
+    text_type: Enum,
+    renderer: Callable[[TextNode], LeafNode],
+    html_renderer: Optional[Callable[[str, Optional[str]], str]] = None,
+):
+    # text types are enum members, extensions bring their own enum; without an
+    # html_renderer the fast path goes through the node renderer
+    TEXT_RENDERERS[text_type] = renderer
+    if html_renderer is None:
+        TEXT_HTML_RENDERERS.pop(text_type, None)
+    else:
+        TEXT_HTML_RENDERERS[text_type] = html_renderer
+
+
 def text_node_to_html_node(text_node: TextNode):
-    if text_node.text_type == TextType.TEXT:
-        return LeafNode(None, text_node.text)
-    if text_node.text_type == TextType.BOLD:
-        return LeafNode("b", text_node.text)
-    if text_node.text_type == TextType.ITALIC:
-        return LeafNode("i", text_node.text)
-    if text_node.text_type == TextType.CODE:
-        return LeafNode("code", text_node.text)
-    if text_node.text_type == TextType.LINK:
-        if text_node.url is None:
-            raise ValueError("Url is required for link node")
-        return LeafNode("a", text_node.text, {"href": text_node.url})
-    if text_node.text_type == TextType.IMAGE:
-        if text_node.url is None:
-            raise ValueError("Url is required for image node")
-        return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
-
-    raise ValueError(f"Invalid text type: {text_node.text_type}")
+    renderer = TEXT_RENDERERS.get(text_node.text_type)
+    if renderer is None:
+        raise ValueError(f"Invalid text type: {text_node.text_type}")
+    return renderer(text_node)
+
+
+def text_to_html(text: str, text_type: Enum, url: Optional[str] = None) -> str:
+    html_renderer = TEXT_HTML_RENDERERS.get(text_type)
+    if html_renderer is None:
+        return text_node_to_html_node(TextNode(text, text_type, url)).to_html()
+    return html_renderer(text, url)
@@ -0,0 +1,194 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from discovery import is_ignored, iter_files
+
+
+def snapshot(paths: Iterable[str]) -> Dict[str, Tuple[int, int]]:
+    state = {}
+    for path in paths:
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            state[path] = (stat.st_mtime_ns, stat.st_size)
+            continue
+        for _, entry in iter_files(path):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            state[entry.path] = (stat.st_mtime_ns, stat.st_size)
+    return state
+
+
+class PollingWatcher:
+    def __init__(self, paths: List[str], interval: float = 0.05):
+        self.paths = paths
+        self.interval = interval
+        self.state = snapshot(paths)
+
+    def poll(self, timeout: Optional[float]) -> Set[str]:
+        time.sleep(self.interval if timeout is None else min(timeout, self.interval))
+        new_state = snapshot(self.paths)
+        changed = {
+            path
+            for path in self.state.keys() | new_state.keys()
+            if self.state.get(path) != new_state.get(path)
+        }
+        self.state = new_state
+        return changed
+
+    def close(self):
+        pass
+
+
+# from linux/inotify.h
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = (
+    IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+)
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    def __init__(self, paths: List[str]):
+        libc_name = ctypes.util.find_library("c")
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.libc.inotify_add_watch.argtypes = [
+            ctypes.c_int,
+            ctypes.c_char_p,
+            ctypes.c_uint32,
+        ]
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self.paths = paths
+        self.watched_dirs: Dict[int, str] = {}
+        # single files are watched through their directory and filtered,
+        # keyed by normalized path and reported as they were given
+        self.watched_files: Dict[str, str] = {}
+        for path in paths:
+            if os.path.isfile(path):
+                self.watched_files[os.path.normpath(path)] = path
+                self._add_watch(os.path.dirname(path) or ".")
+            else:
+                self._add_tree(path)
+
+    def _add_watch(self, dir_path: str):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(dir_path), WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            if error == errno.ENOENT:
+                return
+            raise OSError(error, f"inotify_add_watch failed for {dir_path}")
+        self.watched_dirs[wd] = dir_path
+
+    def _add_tree(self, root: str) -> Set[str]:
+        # returns the files found, so a directory moved into the tree is
+        # reported with its contents
+        found = set()
+        for dir_path, _, file_names in os.walk(root):
+            self._add_watch(dir_path)
+            found.update(os.path.join(dir_path, name) for name in file_names)
+        return found
+
+    def _is_watched(self, path: str) -> bool:
+        return any(
+            path == root or path.startswith(os.path.join(root, ""))
+            for root in self.paths
+            if os.path.normpath(root) not in self.watched_files
+        )
+
+    def poll(self, timeout: Optional[float]) -> Set[str]:
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self.fd, 1 << 16)
+        except BlockingIOError:
+            return set()
+
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, name_length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset : offset + name_length].rstrip(b"\0")
+            offset += name_length
+
+            if mask & IN_Q_OVERFLOW:
+                # events were dropped, report every root so callers rebuild
+                return set(self.paths)
+            if mask & IN_IGNORED:
+                self.watched_dirs.pop(wd, None)
+                continue
+            dir_path = self.watched_dirs.get(wd)
+            if dir_path is None:
+                continue
+            path = os.path.join(dir_path, os.fsdecode(name)) if name else dir_path
+            watched_file = self.watched_files.get(os.path.normpath(path))
+            if watched_file is not None:
+                changed.add(watched_file)
+                continue
+            if not self._is_watched(path):
+                continue
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                changed |= self._add_tree(path)
+            changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+def create_watcher(paths: List[str]):
+    try:
+        return InotifyWatcher(paths)
+    except (OSError, AttributeError, TypeError):
+        # no inotify on this platform, fall back to stat polling
+        return PollingWatcher(paths)
+
+
+def watch_paths(
+    paths: List[str],
+    on_change: Callable[[Set[str]], None],
+    debounce: float = 0.02,
+):
+    watcher = create_watcher(paths)
+    try:
+        while True:
+            changed = watcher.poll(None)
+            if not changed:
+                continue
+            # an editor save is often several events in a row, wait for quiet
+            while True:
+                more = watcher.poll(debounce)
+                if not more:
+                    break
+                changed |= more
+            changed = {path for path in changed if not is_ignored(path)}
+            if changed:
+                on_change(changed)
+    finally:
+        watcher.close()